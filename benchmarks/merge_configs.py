@@ -0,0 +1,41 @@
+"""Benchmark ConfigService.merge_configs against the number of fragments.
+
+Run with ``poetry run python benchmarks/merge_configs.py``. Merging is expected
+to scale linearly: the time per fragment should stay roughly constant as the
+fragment count grows.
+"""
+
+import time
+
+from hier_config_api.services.config_service import ConfigService
+from hier_config_api.utils.cache import parse_cache
+
+LINES_PER_FRAGMENT = 200
+
+
+def make_fragment(index: int) -> str:
+    """Build a config fragment with its own interfaces plus a shared section."""
+    lines = []
+    for port in range(LINES_PER_FRAGMENT // 4):
+        lines.append(f"interface Ethernet{index}/{port}")
+        lines.append(f" description fragment {index} port {port}")
+        lines.append(" no shutdown")
+    lines.append("router bgp 65001")
+    lines.append(f" neighbor 10.0.{index // 256}.{index % 256} remote-as 65002")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Print merge time for increasing fragment counts."""
+    print(f"{'fragments':>10} {'seconds':>10} {'ms/fragment':>12}")
+    for count in (15, 30, 60, 120, 240):
+        fragments = [make_fragment(i) for i in range(count)]
+        parse_cache.clear()
+        start = time.perf_counter()
+        ConfigService.merge_configs("cisco_ios", fragments)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>10} {elapsed:>10.3f} {1000 * elapsed / count:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
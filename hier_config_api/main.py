@@ -1,9 +1,31 @@
 """Main FastAPI application for hier-config-api."""
 
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from hier_config_api.routers import batch, configs, platforms, remediation, reports
+from hier_config_api.routers import (
+    admin,
+    baselines,
+    batch,
+    configs,
+    platforms,
+    remediation,
+    reports,
+)
+from hier_config_api.utils.executor import executor
+from hier_config_api.utils.storage import storage
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Shut down worker pools and storage when the application stops."""
+    yield
+    executor.shutdown()
+    storage.close()
+
 
 app = FastAPI(
     title="Hier-Config API",
@@ -12,6 +34,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -26,9 +49,11 @@ app.add_middleware(
 # Include routers
 app.include_router(configs.router)
 app.include_router(remediation.router)
+app.include_router(baselines.router)
 app.include_router(reports.router)
 app.include_router(platforms.router)
 app.include_router(batch.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
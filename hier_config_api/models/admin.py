@@ -0,0 +1,17 @@
+"""Pydantic models for administrative endpoints."""
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class StatsResponse(BaseModel):
+    """Memory and occupancy statistics of the server process."""
+
+    storage_backend: str = Field(..., description="Active storage backend (memory or sqlite)")
+    storage: dict[str, dict[str, Any]] = Field(
+        ..., description="Entry counts and approximate bytes per storage collection"
+    )
+    caches: dict[str, dict[str, Any]] = Field(
+        ..., description="Occupancy and hit/miss counters per cache"
+    )
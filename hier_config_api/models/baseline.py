@@ -0,0 +1,50 @@
+"""Pydantic models for device baselines."""
+
+from pydantic import BaseModel, Field
+
+from hier_config_api.models.remediation import RemediationSummary
+
+
+class ConfigPatchHunk(BaseModel):
+    """Replacement of a range of lines of a config."""
+
+    start: int = Field(..., description="Index of the first replaced line in the baseline", ge=0)
+    delete: int = Field(0, description="Number of baseline lines removed", ge=0)
+    insert: list[str] = Field(default_factory=list, description="Lines inserted at start")
+
+
+class RegisterBaselineRequest(BaseModel):
+    """Request model for registering a device baseline."""
+
+    platform: str = Field(..., description="Platform type (e.g., cisco_ios, juniper_junos)")
+    running_config: str = Field(..., description="Current running configuration")
+    intended_config: str = Field(..., description="Desired configuration state")
+
+
+class BaselineDeltaRequest(BaseModel):
+    """Request model for submitting a change to a device baseline."""
+
+    base_digest: str = Field(
+        ..., description="running_digest of the baseline the patch was computed against"
+    )
+    patch: list[ConfigPatchHunk] = Field(
+        default_factory=list,
+        description="Non-overlapping hunks in ascending order; empty if the config is unchanged",
+    )
+    intended_config: str | None = Field(
+        None, description="New intended configuration; omit to keep the stored one"
+    )
+
+
+class BaselineResponse(BaseModel):
+    """Response model for a device baseline and its remediation."""
+
+    device_id: str = Field(..., description="Device identifier")
+    platform: str = Field(..., description="Platform type")
+    running_digest: str = Field(..., description="SHA-256 digest of the running configuration")
+    intended_digest: str = Field(..., description="SHA-256 digest of the intended configuration")
+    changed: bool = Field(..., description="Whether the remediation was regenerated")
+    remediation_id: str = Field(..., description="Identifier of the current remediation")
+    remediation_config: str = Field(..., description="Commands to achieve desired state")
+    rollback_config: str = Field(..., description="Commands to rollback changes")
+    summary: RemediationSummary = Field(..., description="Summary of changes")
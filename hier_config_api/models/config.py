@@ -10,6 +10,17 @@ class ParseConfigRequest(BaseModel):
 
     platform: str = Field(..., description="Platform type (e.g., cisco_ios, juniper_junos)")
     config_text: str = Field(..., description="Raw configuration text to parse")
+    output_format: str = Field(
+        "tree",
+        description="Output format: tree (nested dicts) or flat (text/depth/parent arrays)",
+    )
+    path: list[str] | None = Field(
+        None,
+        description="Only serialize sections whose lines start with these prefixes, one per level",
+    )
+    max_depth: int | None = Field(
+        None, description="Levels to include below the selected lines (0 = lines only)", ge=0
+    )
 
 
 class ParseConfigResponse(BaseModel):
@@ -41,6 +52,10 @@ class PredictConfigRequest(BaseModel):
     platform: str = Field(..., description="Platform type (e.g., cisco_ios, juniper_junos)")
     current_config: str = Field(..., description="Current configuration state")
     commands_to_apply: str = Field(..., description="Commands to apply to current config")
+    candidate_commands: list[str] = Field(
+        default_factory=list,
+        description="Additional command sets, each predicted independently against current config",
+    )
 
 
 class PredictConfigResponse(BaseModel):
@@ -50,6 +65,10 @@ class PredictConfigResponse(BaseModel):
     predicted_config: str = Field(
         ..., description="Predicted configuration after applying commands"
     )
+    candidate_predictions: list[str] = Field(
+        default_factory=list,
+        description="Predicted configuration for each candidate command set, in request order",
+    )
 
 
 class MergeConfigRequest(BaseModel):
@@ -59,6 +59,7 @@ class FilterRemediationRequest(BaseModel):
 
     include_tags: list[str] | None = Field(None, description="Only include these tags")
     exclude_tags: list[str] | None = Field(None, description="Exclude these tags")
+    tag_expression: str | None = Field(None, description="Boolean tag expression to match")
 
 
 class FilterRemediationResponse(BaseModel):
@@ -66,4 +67,5 @@ class FilterRemediationResponse(BaseModel):
 
     remediation_id: str = Field(..., description="Remediation identifier")
     filtered_config: str = Field(..., description="Filtered remediation commands")
+    filtered_rollback: str = Field(..., description="Filtered rollback commands")
     summary: RemediationSummary = Field(..., description="Summary of filtered changes")
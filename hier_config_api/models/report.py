@@ -25,6 +25,27 @@ class CreateReportResponse(BaseModel):
 
     report_id: str = Field(..., description="Unique report identifier")
     total_devices: int = Field(..., description="Total number of devices in report")
+    computations_saved: int = Field(
+        0, description="Devices whose remediation was reused from an identical device"
+    )
+
+
+class UpdateReportDevicesRequest(BaseModel):
+    """Request model for adding or replacing devices in a report."""
+
+    remediations: list[DeviceRemediation] = Field(
+        ..., description="Devices to add; devices with an existing device_id are replaced"
+    )
+
+
+class UpdateReportDevicesResponse(BaseModel):
+    """Response model for an incremental report update."""
+
+    report_id: str = Field(..., description="Report identifier")
+    total_devices: int = Field(..., description="Total number of devices in report")
+    devices_added: int = Field(0, description="Number of devices added")
+    devices_replaced: int = Field(0, description="Number of existing devices replaced")
+    devices_removed: int = Field(0, description="Number of devices removed")
 
 
 class ReportSummary(BaseModel):
@@ -36,6 +57,9 @@ class ReportSummary(BaseModel):
     changes_by_tag: dict[str, int] = Field(
         default_factory=dict, description="Count of changes by tag"
     )
+    computations_saved: int = Field(
+        0, description="Devices whose remediation was reused from an identical device"
+    )
 
 
 class ChangeDetail(BaseModel):
@@ -52,7 +76,72 @@ class GetReportChangesResponse(BaseModel):
 
     report_id: str = Field(..., description="Report identifier")
     changes: list[ChangeDetail] = Field(..., description="Detailed list of changes")
-    total_unique_changes: int = Field(..., description="Number of unique changes")
+    total_unique_changes: int = Field(
+        ..., description="Number of unique changes matching the filters"
+    )
+    next_cursor: str | None = Field(
+        None, description="Cursor for the next page, or null on the last page"
+    )
+
+
+class RemediationCohort(BaseModel):
+    """Devices of one platform sharing an identical remediation."""
+
+    fingerprint: str = Field(..., description="SHA-256 digest of the shared remediation")
+    platform: str = Field(..., description="Platform of every device in the cohort")
+    device_count: int = Field(..., description="Number of devices in the cohort")
+    device_ids: list[str] = Field(..., description="Device IDs in the cohort")
+    remediation: str = Field(..., description="Remediation shared by every device in the cohort")
+
+
+class GetReportCohortsResponse(BaseModel):
+    """Response model for remediation cohorts."""
+
+    report_id: str = Field(..., description="Report identifier")
+    cohorts: list[RemediationCohort] = Field(
+        ..., description="Cohorts sorted by descending device count"
+    )
+    total_cohorts: int = Field(..., description="Number of cohorts returned")
+
+
+class ReportQueryRequest(BaseModel):
+    """Request model for selecting report devices by their changes."""
+
+    all_of: list[str] = Field(
+        default_factory=list, description="Change lines every selected device must have"
+    )
+    any_of: list[str] = Field(
+        default_factory=list,
+        description="Change lines of which a selected device must have at least one",
+    )
+    none_of: list[str] = Field(
+        default_factory=list, description="Change lines a selected device must not have"
+    )
+    platforms: list[str] = Field(
+        default_factory=list, description="Only select devices of these platforms"
+    )
+    top_changes: int = Field(
+        0, ge=0, description="Number of most common changes among selected devices to return"
+    )
+
+
+class ChangeCount(BaseModel):
+    """A change and the number of selected devices that have it."""
+
+    change_text: str = Field(..., description="The configuration change text")
+    device_count: int = Field(..., description="Number of selected devices with this change")
+
+
+class ReportQueryResponse(BaseModel):
+    """Response model for a report device query."""
+
+    report_id: str = Field(..., description="Report identifier")
+    device_count: int = Field(..., description="Number of selected devices")
+    device_ids: list[str] = Field(..., description="Selected device IDs")
+    by_platform: dict[str, int] = Field(..., description="Selected device count per platform")
+    top_changes: list[ChangeCount] = Field(
+        default_factory=list, description="Most common changes among selected devices"
+    )
 
 
 class ExportFormat(BaseModel):
@@ -0,0 +1,31 @@
+"""API router for administrative endpoints."""
+
+from fastapi import APIRouter, HTTPException
+
+from hier_config_api.models.admin import StatsResponse
+from hier_config_api.settings import settings
+from hier_config_api.utils.cache import parse_cache, remediation_cache
+from hier_config_api.utils.storage import run_storage, storage
+from hier_config_api.utils.tagging import tag_matcher_cache
+
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
+
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_stats() -> StatsResponse:
+    """Report entry counts and memory use of storage collections and caches.
+
+    Figures are for the process that serves the request.
+    """
+    try:
+        return StatsResponse(
+            storage_backend=settings.storage_backend,
+            storage=await run_storage(storage.stats),
+            caches={
+                "parse": parse_cache.stats(),
+                "remediation": remediation_cache.stats(),
+                "tag_matcher": tag_matcher_cache.stats(),
+            },
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}") from e
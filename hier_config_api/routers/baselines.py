@@ -0,0 +1,126 @@
+"""API router for device baselines."""
+
+from typing import Any
+
+from fastapi import APIRouter, HTTPException
+
+from hier_config_api.models.baseline import (
+    BaselineDeltaRequest,
+    BaselineResponse,
+    RegisterBaselineRequest,
+)
+from hier_config_api.services.baseline_service import BaselineService
+from hier_config_api.utils.executor import executor
+from hier_config_api.utils.storage import RecordTooLargeError, run_storage, storage
+
+router = APIRouter(prefix="/api/v1/baselines", tags=["baselines"])
+
+
+@router.put("/{device_id}", response_model=BaselineResponse)
+async def register_baseline(device_id: str, request: RegisterBaselineRequest) -> BaselineResponse:
+    """Register the full configs of a device, replacing any previous baseline."""
+    try:
+        baseline = await executor.run(
+            BaselineService.build_baseline,
+            request.platform,
+            request.running_config,
+            request.intended_config,
+            size_hint=len(request.running_config) + len(request.intended_config),
+        )
+        baseline["remediation_id"] = await run_storage(
+            storage.store_remediation, baseline["remediation"]
+        )
+        await run_storage(storage.store_baseline, device_id, baseline)
+    except RecordTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to register baseline: {str(e)}") from e
+
+    return _baseline_response(device_id, baseline, changed=True)
+
+
+@router.get("/{device_id}", response_model=BaselineResponse)
+async def get_baseline(device_id: str) -> BaselineResponse:
+    """Get the baseline of a device and its current remediation."""
+    baseline = await run_storage(storage.get_baseline, device_id)
+    if not baseline:
+        raise HTTPException(status_code=404, detail="Baseline not found")
+
+    await _keep_remediation(baseline)
+    return _baseline_response(device_id, baseline, changed=False)
+
+
+@router.post("/{device_id}/delta", response_model=BaselineResponse)
+async def submit_delta(device_id: str, request: BaselineDeltaRequest) -> BaselineResponse:
+    """Apply a running config patch to a device baseline and remediate if anything changed.
+
+    An empty patch without an intended config reports the device as unchanged
+    and returns the stored remediation without any work. Returns 409 when
+    base_digest is not the current running_digest; the client should then
+    resend the full configs.
+    """
+    baseline = await run_storage(storage.get_baseline, device_id)
+    if not baseline:
+        raise HTTPException(status_code=404, detail="Baseline not found")
+    if request.base_digest != baseline["running_digest"]:
+        raise HTTPException(status_code=409, detail="Baseline digest does not match")
+    if not request.patch and request.intended_config is None:
+        await _keep_remediation(baseline)
+        return _baseline_response(device_id, baseline, changed=False)
+
+    try:
+        updated = await executor.run(
+            BaselineService.apply_delta,
+            baseline,
+            request.patch,
+            request.intended_config,
+            size_hint=len(baseline["running_config"]) + len(baseline["intended_config"]),
+        )
+        if updated is None:
+            await _keep_remediation(baseline)
+            return _baseline_response(device_id, baseline, changed=False)
+
+        updated["remediation_id"] = await run_storage(
+            storage.store_remediation, updated["remediation"]
+        )
+        stored = await run_storage(
+            storage.store_baseline, device_id, updated, expected_digest=baseline["running_digest"]
+        )
+    except RecordTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to apply delta: {str(e)}") from e
+
+    if not stored:
+        raise HTTPException(status_code=409, detail="Baseline changed while applying delta")
+    return _baseline_response(device_id, updated, changed=True)
+
+
+async def _keep_remediation(baseline: dict[str, Any]) -> None:
+    """Keep the remediation of a baseline alive, restoring it under its ID if it is gone.
+
+    Remediations can be evicted or expire on their own, but a baseline's
+    remediation_id must stay valid for as long as the baseline is in use.
+    """
+    if not await run_storage(storage.touch_remediation, baseline["remediation_id"]):
+        await run_storage(
+            storage.store_remediation,
+            baseline["remediation"],
+            remediation_id=baseline["remediation_id"],
+        )
+
+
+def _baseline_response(device_id: str, baseline: dict[str, Any], changed: bool) -> BaselineResponse:
+    """Build the response for a stored baseline."""
+    remediation = baseline["remediation"]
+    return BaselineResponse(
+        device_id=device_id,
+        platform=baseline["platform"],
+        running_digest=baseline["running_digest"],
+        intended_digest=baseline["intended_digest"],
+        changed=changed,
+        remediation_id=baseline["remediation_id"],
+        remediation_config=remediation["remediation_config"],
+        rollback_config=remediation["rollback_config"],
+        summary=remediation["summary"],
+    )
@@ -1,6 +1,7 @@
 """API router for batch operations."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
 from hier_config_api.models.platform import (
     BatchJobRequest,
@@ -9,23 +10,28 @@ from hier_config_api.models.platform import (
     BatchJobStatus,
 )
 from hier_config_api.services.platform_service import PlatformService
-from hier_config_api.utils.storage import storage
+from hier_config_api.utils.storage import RecordTooLargeError, run_storage, storage
 
 router = APIRouter(prefix="/api/v1/batch", tags=["batch"])
 
 
 @router.post("/remediation", response_model=BatchJobResponse)
-async def create_batch_remediation(request: BatchJobRequest) -> BatchJobResponse:
-    """Create a batch remediation job for multiple devices."""
+async def create_batch_remediation(
+    request: BatchJobRequest, background_tasks: BackgroundTasks
+) -> BatchJobResponse:
+    """Create a batch remediation job for multiple devices.
+
+    The job is queued and processed in the background; poll its status for progress.
+    """
     try:
         job_data = PlatformService.create_batch_job(request.device_configs)
-        job_id = storage.store_job(job_data)
+        job_id = await run_storage(storage.store_job, job_data)
 
-        # Process the job (in a real implementation, this would be async/background)
-        PlatformService.process_batch_job(job_data)
-        storage.update_job(job_id, job_data)
+        background_tasks.add_task(PlatformService.run_batch_job, job_id)
 
         return BatchJobResponse(job_id=job_id, total_devices=job_data["total_devices"])
+    except RecordTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create batch job: {str(e)}") from e
 
@@ -33,7 +39,7 @@ async def create_batch_remediation(request: BatchJobRequest) -> BatchJobResponse
 @router.get("/jobs/{job_id}", response_model=BatchJobStatus)
 async def get_batch_job_status(job_id: str) -> BatchJobStatus:
     """Get the status of a batch job."""
-    job_data = storage.get_job(job_id)
+    job_data = await run_storage(storage.get_job_status, job_id)
     if not job_data:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -53,7 +59,7 @@ async def get_batch_job_status(job_id: str) -> BatchJobStatus:
 @router.get("/jobs/{job_id}/results", response_model=BatchJobResults)
 async def get_batch_job_results(job_id: str) -> BatchJobResults:
     """Get the results of a completed batch job."""
-    job_data = storage.get_job(job_id)
+    job_data = await run_storage(storage.get_job, job_id, include_device_configs=False)
     if not job_data:
         raise HTTPException(status_code=404, detail="Job not found")
 
@@ -76,3 +82,20 @@ async def get_batch_job_results(job_id: str) -> BatchJobResults:
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to get job results: {str(e)}") from e
+
+
+@router.get("/jobs/{job_id}/results/stream")
+async def stream_batch_job_results(
+    job_id: str, status: str | None = Query(None)
+) -> StreamingResponse:
+    """Stream batch job results as NDJSON, one line per device, while the job runs."""
+    if not await run_storage(storage.get_job_status, job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if status not in (None, "success", "failed"):
+        raise HTTPException(status_code=400, detail="Status must be one of: success, failed")
+
+    return StreamingResponse(
+        PlatformService.stream_job_results(job_id, status_filter=status),
+        media_type="application/x-ndjson",
+    )
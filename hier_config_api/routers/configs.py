@@ -15,6 +15,7 @@ from hier_config_api.models.config import (
     SearchConfigResponse,
 )
 from hier_config_api.services.config_service import ConfigService
+from hier_config_api.utils.executor import executor
 
 router = APIRouter(prefix="/api/v1/configs", tags=["configurations"])
 
@@ -23,7 +24,15 @@ router = APIRouter(prefix="/api/v1/configs", tags=["configurations"])
 async def parse_config(request: ParseConfigRequest) -> ParseConfigResponse:
     """Parse configuration text into structured format."""
     try:
-        structured_config = ConfigService.parse_config(request.platform, request.config_text)
+        structured_config = await executor.run(
+            ConfigService.parse_config,
+            request.platform,
+            request.config_text,
+            request.output_format,
+            request.path,
+            request.max_depth,
+            size_hint=len(request.config_text),
+        )
         return ParseConfigResponse(platform=request.platform, structured_config=structured_config)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse config: {str(e)}") from e
@@ -33,8 +42,12 @@ async def parse_config(request: ParseConfigRequest) -> ParseConfigResponse:
 async def compare_configs(request: CompareConfigRequest) -> CompareConfigResponse:
     """Compare two configurations and return differences."""
     try:
-        unified_diff, has_changes = ConfigService.compare_configs(
-            request.platform, request.running_config, request.intended_config
+        unified_diff, has_changes = await executor.run(
+            ConfigService.compare_configs,
+            request.platform,
+            request.running_config,
+            request.intended_config,
+            size_hint=len(request.running_config) + len(request.intended_config),
         )
         return CompareConfigResponse(
             platform=request.platform, unified_diff=unified_diff, has_changes=has_changes
@@ -47,10 +60,19 @@ async def compare_configs(request: CompareConfigRequest) -> CompareConfigRespons
 async def predict_config(request: PredictConfigRequest) -> PredictConfigResponse:
     """Predict future configuration state after applying commands."""
     try:
-        predicted_config = ConfigService.predict_config(
-            request.platform, request.current_config, request.commands_to_apply
+        command_sets = [request.commands_to_apply, *request.candidate_commands]
+        predicted_config, *candidate_predictions = await executor.run(
+            ConfigService.predict_configs,
+            request.platform,
+            request.current_config,
+            command_sets,
+            size_hint=len(request.current_config) + sum(len(c) for c in command_sets),
+        )
+        return PredictConfigResponse(
+            platform=request.platform,
+            predicted_config=predicted_config,
+            candidate_predictions=candidate_predictions,
         )
-        return PredictConfigResponse(platform=request.platform, predicted_config=predicted_config)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to predict config: {str(e)}") from e
 
@@ -59,7 +81,12 @@ async def predict_config(request: PredictConfigRequest) -> PredictConfigResponse
 async def merge_configs(request: MergeConfigRequest) -> MergeConfigResponse:
     """Merge multiple configurations into one."""
     try:
-        merged_config = ConfigService.merge_configs(request.platform, request.configs)
+        merged_config = await executor.run(
+            ConfigService.merge_configs,
+            request.platform,
+            request.configs,
+            size_hint=sum(len(config) for config in request.configs),
+        )
         return MergeConfigResponse(platform=request.platform, merged_config=merged_config)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to merge configs: {str(e)}") from e
@@ -69,13 +96,15 @@ async def merge_configs(request: MergeConfigRequest) -> MergeConfigResponse:
 async def search_config(request: SearchConfigRequest) -> SearchConfigResponse:
     """Search configuration for matching sections."""
     try:
-        matches = ConfigService.search_config(
+        matches = await executor.run(
+            ConfigService.search_config,
             platform=request.platform,
             config_text=request.config_text,
             equals=request.match_rules.equals,
             contains=request.match_rules.contains,
             startswith=request.match_rules.startswith,
             regex_pattern=request.match_rules.regex,
+            size_hint=len(request.config_text),
         )
         return SearchConfigResponse(
             platform=request.platform, matches=matches, match_count=len(matches)
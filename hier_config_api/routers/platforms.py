@@ -9,6 +9,7 @@ from hier_config_api.models.platform import (
     ValidateConfigResponse,
 )
 from hier_config_api.services.platform_service import PlatformService
+from hier_config_api.utils.executor import executor
 
 router = APIRouter(prefix="/api/v1/platforms", tags=["platforms"])
 
@@ -37,7 +38,12 @@ async def get_platform_rules(platform: str) -> PlatformRules:
 async def validate_config(platform: str, request: ValidateConfigRequest) -> ValidateConfigResponse:
     """Validate configuration for a specific platform."""
     try:
-        result = PlatformService.validate_config(platform, request.config_text)
+        result = await executor.run(
+            PlatformService.validate_config,
+            platform,
+            request.config_text,
+            size_hint=len(request.config_text),
+        )
         return ValidateConfigResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to validate config: {str(e)}") from e
@@ -1,6 +1,6 @@
 """API router for remediation operations."""
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 
 from hier_config_api.models.remediation import (
     ApplyTagsRequest,
@@ -10,26 +10,37 @@ from hier_config_api.models.remediation import (
     GenerateRemediationResponse,
 )
 from hier_config_api.services.remediation_service import RemediationService
-from hier_config_api.utils.storage import storage
+from hier_config_api.utils.executor import executor
+from hier_config_api.utils.storage import RecordTooLargeError, run_storage, storage
 
 router = APIRouter(prefix="/api/v1/remediation", tags=["remediation"])
 
 
 @router.post("/generate", response_model=GenerateRemediationResponse)
-async def generate_remediation(request: GenerateRemediationRequest) -> GenerateRemediationResponse:
-    """Generate remediation and rollback configurations."""
+async def generate_remediation(
+    request: GenerateRemediationRequest, response: Response
+) -> GenerateRemediationResponse:
+    """Generate remediation and rollback configurations.
+
+    The ``X-Remediation-Cache`` response header is ``HIT`` when the result was
+    served from the remediation cache and ``MISS`` otherwise.
+    """
     try:
-        result = RemediationService.generate_remediation(
+        result = await executor.run(
+            RemediationService.generate_remediation,
             platform=request.platform,
             running_config=request.running_config,
             intended_config=request.intended_config,
             tag_rules=request.tag_rules,
             include_tags=request.include_tags,
             exclude_tags=request.exclude_tags,
+            size_hint=len(request.running_config) + len(request.intended_config),
         )
 
+        response.headers["X-Remediation-Cache"] = "HIT" if result.pop("cached") else "MISS"
+
         # Store remediation
-        remediation_id = storage.store_remediation(result)
+        remediation_id = await run_storage(storage.store_remediation, result)
         result["remediation_id"] = remediation_id
 
         return GenerateRemediationResponse(
@@ -40,6 +51,8 @@ async def generate_remediation(request: GenerateRemediationRequest) -> GenerateR
             summary=result["summary"],
             tags=result["tags"],
         )
+    except RecordTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(
             status_code=400, detail=f"Failed to generate remediation: {str(e)}"
@@ -49,19 +62,29 @@ async def generate_remediation(request: GenerateRemediationRequest) -> GenerateR
 @router.post("/{remediation_id}/tags", response_model=ApplyTagsResponse)
 async def apply_tags(remediation_id: str, request: ApplyTagsRequest) -> ApplyTagsResponse:
     """Apply tags to an existing remediation."""
-    remediation_data = storage.get_remediation(remediation_id)
+    remediation_data = await run_storage(storage.get_remediation, remediation_id)
     if not remediation_data:
         raise HTTPException(status_code=404, detail="Remediation not found")
 
     try:
         remediation_config = remediation_data["remediation_config"]
-        tagged_config, tags = RemediationService.apply_tags(remediation_config, request.tag_rules)
+        rollback_config = remediation_data["rollback_config"]
+        tags, tag_index = await executor.run(
+            RemediationService.tag_remediation,
+            remediation_data["platform"],
+            remediation_config,
+            rollback_config,
+            request.tag_rules,
+            size_hint=len(remediation_config) + len(rollback_config),
+        )
 
         # Update stored remediation
-        storage.update_remediation(remediation_id, {"tags": tags})
+        await run_storage(
+            storage.update_remediation, remediation_id, {"tags": tags, "tag_index": tag_index}
+        )
 
         return ApplyTagsResponse(
-            remediation_id=remediation_id, remediation_config=tagged_config, tags=tags
+            remediation_id=remediation_id, remediation_config=remediation_config, tags=tags
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to apply tags: {str(e)}") from e
@@ -72,22 +95,36 @@ async def filter_remediation(
     remediation_id: str,
     include_tags: list[str] = Query(None),
     exclude_tags: list[str] = Query(None),
+    tag_expression: str | None = Query(
+        None, description="Boolean tag expression, e.g. (bgp or ospf) and not risky"
+    ),
 ) -> FilterRemediationResponse:
-    """Filter remediation by tags."""
-    remediation_data = storage.get_remediation(remediation_id)
+    """Filter remediation and rollback by tags."""
+    remediation_data = await run_storage(storage.get_remediation, remediation_id)
     if not remediation_data:
         raise HTTPException(status_code=404, detail="Remediation not found")
 
     try:
         remediation_config = remediation_data["remediation_config"]
-        tags = remediation_data.get("tags", {})
-
-        filtered_config, summary = RemediationService.filter_remediation(
-            remediation_config, tags, include_tags, exclude_tags
+        rollback_config = remediation_data["rollback_config"]
+
+        filtered_config, filtered_rollback, summary = await executor.run(
+            RemediationService.filter_remediation,
+            remediation_data["platform"],
+            remediation_config,
+            rollback_config,
+            remediation_data.get("tag_index", {}),
+            include_tags,
+            exclude_tags,
+            tag_expression,
+            size_hint=len(remediation_config) + len(rollback_config),
         )
 
         return FilterRemediationResponse(
-            remediation_id=remediation_id, filtered_config=filtered_config, summary=summary
+            remediation_id=remediation_id,
+            filtered_config=filtered_config,
+            filtered_rollback=filtered_rollback,
+            summary=summary,
         )
     except Exception as e:
         raise HTTPException(
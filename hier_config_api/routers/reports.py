@@ -1,16 +1,25 @@
 """API router for multi-device reporting."""
 
+from typing import Any
+
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import StreamingResponse
 
 from hier_config_api.models.report import (
     CreateReportRequest,
     CreateReportResponse,
     GetReportChangesResponse,
+    GetReportCohortsResponse,
+    RemediationCohort,
+    ReportQueryRequest,
+    ReportQueryResponse,
     ReportSummary,
+    UpdateReportDevicesRequest,
+    UpdateReportDevicesResponse,
 )
 from hier_config_api.services.report_service import ReportService
-from hier_config_api.utils.storage import storage
+from hier_config_api.utils.executor import executor
+from hier_config_api.utils.storage import RecordTooLargeError, run_storage, storage
 
 router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
 
@@ -19,18 +28,105 @@ router = APIRouter(prefix="/api/v1/reports", tags=["reports"])
 async def create_report(request: CreateReportRequest) -> CreateReportResponse:
     """Create a multi-device report."""
     try:
-        report_data = ReportService.create_report(request.remediations)
-        report_id = storage.store_report(report_data)
+        report_data = await executor.run(
+            ReportService.create_report,
+            request.remediations,
+            size_hint=sum(
+                len(device.running_config) + len(device.intended_config)
+                for device in request.remediations
+            ),
+        )
+        report_id = await run_storage(storage.store_report, report_data)
 
-        return CreateReportResponse(report_id=report_id, total_devices=report_data["total_devices"])
+        return CreateReportResponse(
+            report_id=report_id,
+            total_devices=report_data["total_devices"],
+            computations_saved=report_data["computations_saved"],
+        )
+    except RecordTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create report: {str(e)}") from e
 
 
+@router.put("/{report_id}/devices", response_model=UpdateReportDevicesResponse)
+async def upsert_report_devices(
+    report_id: str, request: UpdateReportDevicesRequest
+) -> UpdateReportDevicesResponse:
+    """Add devices to a report or replace existing devices with the same device_id.
+
+    Only the submitted devices are remediated; report aggregates and indexes are
+    updated incrementally.
+    """
+    report_data = await run_storage(storage.get_report, report_id)
+    if not report_data:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    try:
+        results, computations_saved = await executor.run(
+            ReportService.remediate_devices,
+            request.remediations,
+            size_hint=sum(
+                len(device.running_config) + len(device.intended_config)
+                for device in request.remediations
+            ),
+        )
+
+        def apply_update(report: dict[str, Any]) -> tuple[dict[str, int], int]:
+            counts = ReportService.upsert_devices(report, request.remediations, results)
+            report["computations_saved"] += computations_saved
+            counts["total_devices"] = report["total_devices"]
+            return counts, counts.pop("size_delta")
+
+        # Applied atomically so concurrent updates of the report, from any worker, serialize
+        counts = await run_storage(storage.modify_report, report_id, apply_update)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to update report: {str(e)}") from e
+
+    if counts is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return UpdateReportDevicesResponse(
+        report_id=report_id,
+        total_devices=counts["total_devices"],
+        devices_added=counts["devices_added"],
+        devices_replaced=counts["devices_replaced"],
+        devices_removed=0,
+    )
+
+
+@router.delete("/{report_id}/devices/{device_id}", response_model=UpdateReportDevicesResponse)
+async def remove_report_device(report_id: str, device_id: str) -> UpdateReportDevicesResponse:
+    """Remove a device from a report."""
+
+    def apply_removal(report: dict[str, Any]) -> tuple[tuple[int, int], int]:
+        removed, size_delta = ReportService.remove_devices(report, [device_id])
+        return (removed, report["total_devices"]), size_delta
+
+    try:
+        outcome = await run_storage(storage.modify_report, report_id, apply_removal)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to update report: {str(e)}") from e
+
+    if outcome is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    removed, total_devices = outcome
+    if not removed:
+        raise HTTPException(status_code=404, detail="Device not found")
+
+    return UpdateReportDevicesResponse(
+        report_id=report_id,
+        total_devices=total_devices,
+        devices_added=0,
+        devices_replaced=0,
+        devices_removed=removed,
+    )
+
+
 @router.get("/{report_id}/summary", response_model=ReportSummary)
 async def get_report_summary(report_id: str) -> ReportSummary:
     """Get summary statistics for a report."""
-    report_data = storage.get_report(report_id)
+    report_data = await run_storage(storage.get_report, report_id)
     if not report_data:
         raise HTTPException(status_code=404, detail="Report not found")
 
@@ -44,18 +140,39 @@ async def get_report_summary(report_id: str) -> ReportSummary:
 
 @router.get("/{report_id}/changes", response_model=GetReportChangesResponse)
 async def get_report_changes(
-    report_id: str, tag: str | None = Query(None), min_devices: int = Query(1)
+    report_id: str,
+    tag: str | None = Query(None),
+    min_devices: int = Query(1),
+    sort: str = Query("first_seen"),
+    cursor: str | None = Query(None),
+    limit: int | None = Query(None, ge=1),
 ) -> GetReportChangesResponse:
-    """Get detailed change analysis for a report."""
-    report_data = storage.get_report(report_id)
+    """Get detailed change analysis for a report.
+
+    Changes can be sorted by ``first_seen``, ``device_count_desc`` or
+    ``device_count_asc`` and paged with ``limit`` and the returned ``next_cursor``.
+    """
+    report_data = await run_storage(storage.get_report, report_id)
     if not report_data:
         raise HTTPException(status_code=404, detail="Report not found")
 
     try:
-        changes = ReportService.get_changes(report_data, tag_filter=tag, min_devices=min_devices)
+        changes, total, next_cursor = await executor.run(
+            ReportService.query_changes,
+            report_data,
+            tag_filter=tag,
+            min_devices=min_devices,
+            sort=sort,
+            cursor=cursor,
+            limit=limit,
+            use_process_pool=False,
+        )
 
         return GetReportChangesResponse(
-            report_id=report_id, changes=changes, total_unique_changes=len(changes)
+            report_id=report_id,
+            changes=changes,
+            total_unique_changes=total,
+            next_cursor=next_cursor,
         )
     except Exception as e:
         raise HTTPException(
@@ -63,10 +180,68 @@ async def get_report_changes(
         ) from e
 
 
-@router.get("/{report_id}/export", response_class=PlainTextResponse)
-async def export_report(report_id: str, format: str = Query("json")) -> str:
-    """Export report in specified format (json, csv, yaml)."""
-    report_data = storage.get_report(report_id)
+@router.get("/{report_id}/cohorts", response_model=GetReportCohortsResponse)
+async def get_report_cohorts(
+    report_id: str, min_devices: int = Query(1)
+) -> GetReportCohortsResponse:
+    """Group report devices into cohorts that share an identical remediation."""
+    report_data = await run_storage(storage.get_report, report_id)
+    if not report_data:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    try:
+        cohorts = await executor.run(
+            ReportService.get_cohorts,
+            report_data,
+            min_devices=min_devices,
+            use_process_pool=False,
+        )
+
+        return GetReportCohortsResponse(
+            report_id=report_id,
+            cohorts=[RemediationCohort(**cohort) for cohort in cohorts],
+            total_cohorts=len(cohorts),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=400, detail=f"Failed to get report cohorts: {str(e)}"
+        ) from e
+
+
+@router.post("/{report_id}/query", response_model=ReportQueryResponse)
+async def query_report_devices(report_id: str, request: ReportQueryRequest) -> ReportQueryResponse:
+    """Select report devices by the changes they have (AND/OR/NOT) and group by platform."""
+    report_data = await run_storage(storage.get_report, report_id)
+    if not report_data:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    try:
+        result = await executor.run(
+            ReportService.query_devices,
+            report_data,
+            all_of=request.all_of,
+            any_of=request.any_of,
+            none_of=request.none_of,
+            platforms=request.platforms,
+            top_changes=request.top_changes,
+            use_process_pool=False,
+        )
+
+        return ReportQueryResponse(report_id=report_id, **result)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to query report: {str(e)}") from e
+
+
+@router.get("/{report_id}/export", response_class=StreamingResponse)
+async def export_report(
+    report_id: str, format: str = Query("json"), gzip: bool = Query(False)
+) -> StreamingResponse:
+    """Export report in specified format (json, csv, yaml).
+
+    The export is streamed in chunks; with ``gzip=true`` it is compressed on the
+    fly and sent with ``Content-Encoding: gzip``.
+    """
+    report_data = await run_storage(storage.get_report, report_id)
     if not report_data:
         raise HTTPException(status_code=404, detail="Report not found")
 
@@ -74,6 +249,13 @@ async def export_report(report_id: str, format: str = Query("json")) -> str:
         raise HTTPException(status_code=400, detail="Format must be one of: json, csv, yaml")
 
     try:
-        return ReportService.export_report(report_data, format_type=format)
+        chunks = ReportService.iter_export(report_data, format_type=format)
+        if gzip:
+            return StreamingResponse(
+                ReportService.gzip_export(chunks),
+                media_type="text/plain",
+                headers={"Content-Encoding": "gzip"},
+            )
+        return StreamingResponse(chunks, media_type="text/plain")
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to export report: {str(e)}") from e
@@ -0,0 +1,80 @@
+"""Service layer for device baselines."""
+
+from typing import Any
+
+from hier_config_api.models.baseline import ConfigPatchHunk
+from hier_config_api.services.remediation_service import RemediationService
+from hier_config_api.utils.cache import content_digest
+
+
+class BaselineService:
+    """Service for remediating devices against a stored baseline."""
+
+    @staticmethod
+    def build_baseline(platform: str, running_config: str, intended_config: str) -> dict[str, Any]:
+        """Remediate a device and return its baseline record.
+
+        The record holds both configs, their digests and the remediation result
+        (without tags) under ``remediation``.
+        """
+        result = RemediationService.generate_remediation(platform, running_config, intended_config)
+        del result["cached"]
+        return {
+            "platform": platform,
+            "running_config": running_config,
+            "intended_config": intended_config,
+            "running_digest": content_digest(running_config),
+            "intended_digest": content_digest(intended_config),
+            "remediation": result,
+        }
+
+    @staticmethod
+    def apply_delta(
+        baseline: dict[str, Any], patch: list[ConfigPatchHunk], intended_config: str | None = None
+    ) -> dict[str, Any] | None:
+        """Apply a running config patch and intended config to a baseline.
+
+        Returns the new baseline record, or None if neither config changed, in
+        which case the stored remediation is still current. Only a changed
+        config is reparsed; the other is served from the parse cache.
+        """
+        running_config = baseline["running_config"]
+        if patch:
+            running_config = BaselineService.apply_patch(running_config, patch)
+        if intended_config is None:
+            intended_config = baseline["intended_config"]
+
+        if (
+            content_digest(running_config) == baseline["running_digest"]
+            and content_digest(intended_config) == baseline["intended_digest"]
+        ):
+            return None
+
+        return BaselineService.build_baseline(baseline["platform"], running_config, intended_config)
+
+    @staticmethod
+    def apply_patch(config: str, patch: list[ConfigPatchHunk]) -> str:
+        """Apply line hunks to config in one pass.
+
+        Hunk positions refer to the lines of the original config, so hunks must
+        be in ascending order and must not overlap. Raises ValueError otherwise.
+        """
+        lines = config.splitlines()
+        patched: list[str] = []
+        position = 0
+        for hunk in patch:
+            if hunk.start < position:
+                raise ValueError(f"Patch hunk at line {hunk.start} overlaps the previous hunk")
+            if hunk.start + hunk.delete > len(lines):
+                raise ValueError(
+                    f"Patch hunk at line {hunk.start} extends past the end of the config "
+                    f"({len(lines)} lines)"
+                )
+            patched.extend(lines[position : hunk.start])
+            patched.extend(hunk.insert)
+            position = hunk.start + hunk.delete
+        patched.extend(lines[position:])
+
+        text = "\n".join(patched)
+        # Keep a trailing newline so unchanged text keeps its digest
+        return text + "\n" if config.endswith("\n") and patched else text
@@ -3,7 +3,10 @@
 import re
 from typing import Any
 
-from hier_config import Platform, WorkflowRemediation, get_hconfig
+from hier_config import HConfig, HConfigChild, Platform, WorkflowRemediation
+from hier_config.models import MatchRule
+
+from hier_config_api.utils.cache import parse_cache
 
 
 class ConfigService:
@@ -23,23 +26,84 @@ class ConfigService:
         return platform_map.get(platform_str.lower(), Platform.GENERIC)
 
     @staticmethod
-    def parse_config(platform: str, config_text: str) -> dict[str, Any]:
-        """Parse configuration text into structured format."""
+    def parse_config(
+        platform: str,
+        config_text: str,
+        output_format: str = "tree",
+        path: list[str] | None = None,
+        max_depth: int | None = None,
+    ) -> dict[str, Any]:
+        """Parse configuration text into structured format.
+
+        ``tree`` returns nested ``text``/``children`` dicts. ``flat`` returns
+        parallel ``text``, ``depth`` and ``parent`` arrays in pre-order, where
+        ``parent`` is the index of the parent line or -1 for top-level lines.
+
+        ``path`` selects sections by line prefix, one prefix per level (e.g.
+        ``["interface"]`` or ``["router bgp", "neighbor"]``); only the matching
+        subtrees are serialized. ``max_depth`` limits how many levels below the
+        selected (or top-level) lines are included, 0 meaning the lines only.
+        """
         platform_enum = ConfigService._get_platform(platform)
-        hconfig = get_hconfig(platform_enum, config_text)
-
-        # Convert HConfig tree to dictionary representation
-        def config_to_dict(config_obj: Any) -> dict[str, Any]:
+        hconfig = parse_cache.get_hconfig(platform_enum, config_text, copy=False)
+
+        if path:
+            roots = list(
+                hconfig.get_children_deep(tuple(MatchRule(startswith=prefix) for prefix in path))
+            )
+        else:
+            roots = list(hconfig.children)
+
+        if output_format == "flat":
+            return ConfigService._config_to_columns(roots, max_depth)
+        if output_format != "tree":
+            raise ValueError(f"Unsupported output format: {output_format}")
+
+        # Only the emitted lines are rendered: a node's str() would render its
+        # whole subtree, past max_depth
+        lines: list[str] = []
+
+        def config_to_dict(config_obj: HConfigChild, depth: int) -> dict[str, Any]:
+            lines.append(config_obj.cisco_style_text())
             result: dict[str, Any] = {
-                "text": str(config_obj),
+                "text": config_obj.text,
                 "children": [],
             }
-            if hasattr(config_obj, "children"):
+            if max_depth is None or depth < max_depth:
                 for child in config_obj.children:
-                    result["children"].append(config_to_dict(child))
+                    result["children"].append(config_to_dict(child, depth + 1))
             return result
 
-        return config_to_dict(hconfig)
+        children = [config_to_dict(node, 0) for node in roots]
+        return {
+            "text": str(hconfig) if not path and max_depth is None else "\n".join(lines),
+            "children": children,
+        }
+
+    @staticmethod
+    def _config_to_columns(
+        roots: list[HConfigChild], max_depth: int | None = None
+    ) -> dict[str, list[Any]]:
+        """Flatten subtrees into parallel text/depth/parent arrays.
+
+        Uses an explicit stack, so arbitrarily deep hierarchies cannot hit the
+        recursion limit.
+        """
+        texts: list[str] = []
+        depths: list[int] = []
+        parents: list[int] = []
+
+        stack: list[tuple[HConfigChild, int, int]] = [(node, 0, -1) for node in reversed(roots)]
+        while stack:
+            node, depth, parent = stack.pop()
+            index = len(texts)
+            texts.append(node.text)
+            depths.append(depth)
+            parents.append(parent)
+            if max_depth is None or depth < max_depth:
+                stack.extend((child, depth + 1, index) for child in reversed(node.children))
+
+        return {"text": texts, "depth": depths, "parent": parents}
 
     @staticmethod
     def compare_configs(
@@ -47,8 +111,8 @@ class ConfigService:
     ) -> tuple[str, bool]:
         """Compare two configurations and return unified diff."""
         platform_enum = ConfigService._get_platform(platform)
-        running_hconfig = get_hconfig(platform_enum, running_config)
-        intended_hconfig = get_hconfig(platform_enum, intended_config)
+        running_hconfig = parse_cache.get_hconfig(platform_enum, running_config, copy=False)
+        intended_hconfig = parse_cache.get_hconfig(platform_enum, intended_config, copy=False)
 
         workflow = WorkflowRemediation(running_hconfig, intended_hconfig)
         remediation = workflow.remediation_config
@@ -77,16 +141,34 @@ class ConfigService:
     @staticmethod
     def predict_config(platform: str, current_config: str, commands_to_apply: str) -> str:
         """Predict configuration state after applying commands."""
-        # Simple merge: append new commands
-        config_lines = current_config.splitlines()
-        command_lines = commands_to_apply.splitlines()
-        predicted_lines = config_lines + command_lines
+        return ConfigService.predict_configs(platform, current_config, [commands_to_apply])[0]
 
-        return "\n".join(predicted_lines)
+    @staticmethod
+    def predict_configs(platform: str, current_config: str, command_sets: list[str]) -> list[str]:
+        """Predict the configuration after applying each command set independently.
+
+        Uses hier_config's future-state computation against one parse of the
+        current config, which is shared by every command set.
+        """
+        platform_enum = ConfigService._get_platform(platform)
+        current_hconfig = parse_cache.get_hconfig(platform_enum, current_config, copy=False)
+
+        predictions = []
+        for commands in command_sets:
+            commands_hconfig = parse_cache.get_hconfig(platform_enum, commands, copy=False)
+            predictions.append(str(current_hconfig.future(commands_hconfig)))
+
+        return predictions
 
     @staticmethod
     def merge_configs(platform: str, configs: list[str]) -> str:
-        """Merge multiple configurations into one."""
+        """Merge multiple configurations into one.
+
+        Every fragment is parsed once and merged in order into a single tree,
+        which is rendered to text at the end. Sections present in several
+        fragments are combined, and for idempotent commands (e.g. ``hostname``)
+        the later fragment wins.
+        """
         if not configs:
             return ""
 
@@ -95,20 +177,26 @@ class ConfigService:
 
         platform_enum = ConfigService._get_platform(platform)
 
-        # Use the first config as base
-        merged = configs[0]
+        # Use a private copy of the first config as the base tree
+        merged = parse_cache.get_hconfig(platform_enum, configs[0])
 
-        # Merge each subsequent config
+        # Merge each subsequent config into the base tree
         for config in configs[1:]:
-            running_hconfig = get_hconfig(platform_enum, merged)
-            intended_hconfig = get_hconfig(platform_enum, config)
+            fragment = parse_cache.get_hconfig(platform_enum, config, copy=False)
+            ConfigService._merge_into(merged, fragment)
 
-            workflow = WorkflowRemediation(running_hconfig, intended_hconfig)
-            remediation = workflow.remediation_config
-            if remediation:
-                merged += "\n" + str(remediation)
+        return str(merged)
 
-        return merged
+    @staticmethod
+    def _merge_into(base: HConfig | HConfigChild, fragment: HConfig | HConfigChild) -> None:
+        """Merge the children of fragment into base in place."""
+        for child in fragment.children:
+            if existing := base.children.get(child.text):
+                ConfigService._merge_into(existing, child)
+                continue
+            if replaced := base.driver.idempotent_for(child, base.children):
+                replaced.delete()
+            base.add_deep_copy_of(child)
 
     @staticmethod
     def search_config(
@@ -121,7 +209,7 @@ class ConfigService:
     ) -> list[str]:
         """Search configuration for matching lines."""
         platform_enum = ConfigService._get_platform(platform)
-        hconfig = get_hconfig(platform_enum, config_text)
+        hconfig = parse_cache.get_hconfig(platform_enum, config_text, copy=False)
 
         matches = []
 
@@ -1,10 +1,20 @@
 """Service layer for platform information and batch operations."""
 
+import asyncio
+import json
+from collections.abc import AsyncIterator
 from typing import Any
 
-from hier_config import Platform, WorkflowRemediation, get_hconfig
+from hier_config import Platform, WorkflowRemediation
 
 from hier_config_api.models.platform import PlatformInfo, PlatformRules
+from hier_config_api.settings import settings
+from hier_config_api.utils.cache import parse_cache
+from hier_config_api.utils.executor import executor
+from hier_config_api.utils.storage import run_storage, storage
+
+# How often a results stream checks storage for newly finished devices
+_STREAM_POLL_INTERVAL_SECONDS = 0.1
 
 
 class PlatformService:
@@ -86,7 +96,7 @@ class PlatformService:
         try:
             # Try to parse the configuration
             platform_enum = PlatformService._get_platform(platform)
-            get_hconfig(platform_enum, config_text)
+            parse_cache.get_hconfig(platform_enum, config_text, copy=False)
 
             # Basic validation checks
             if not config_text.strip():
@@ -124,56 +134,190 @@ class PlatformService:
         }
 
     @staticmethod
-    def process_batch_job(job_data: dict[str, Any]) -> dict[str, Any]:
-        """Process a batch job (simplified synchronous version)."""
-        results = []
-        completed = 0
-        failed = 0
+    def process_device(device_config: dict[str, Any]) -> dict[str, Any]:
+        """Generate remediation for a single device of a batch job."""
+        try:
+            platform = device_config.get("platform", "cisco_ios")
+            running_config = device_config.get("running_config", "")
+            intended_config = device_config.get("intended_config", "")
 
-        for device_config in job_data["device_configs"]:
-            try:
-                # Process each device
-                platform = device_config.get("platform", "cisco_ios")
-                running_config = device_config.get("running_config", "")
-                intended_config = device_config.get("intended_config", "")
+            platform_enum = PlatformService._get_platform(platform)
+            running_hconfig = parse_cache.get_hconfig(platform_enum, running_config, copy=False)
+            intended_hconfig = parse_cache.get_hconfig(platform_enum, intended_config, copy=False)
 
-                platform_enum = PlatformService._get_platform(platform)
-                running_hconfig = get_hconfig(platform_enum, running_config)
-                intended_hconfig = get_hconfig(platform_enum, intended_config)
+            workflow = WorkflowRemediation(running_hconfig, intended_hconfig)
+            remediation = workflow.remediation_config
+            rollback = workflow.rollback_config
 
-                workflow = WorkflowRemediation(running_hconfig, intended_hconfig)
-                remediation = workflow.remediation_config
-                rollback = workflow.rollback_config
+            return {
+                "device_id": device_config.get("device_id"),
+                "status": "success",
+                "remediation": str(remediation) if remediation else "",
+                "rollback": str(rollback) if rollback else "",
+            }
 
-                results.append(
-                    {
-                        "device_id": device_config.get("device_id"),
-                        "status": "success",
-                        "remediation": str(remediation) if remediation else "",
-                        "rollback": str(rollback) if rollback else "",
-                    }
+        except Exception as e:
+            return {
+                "device_id": device_config.get("device_id"),
+                "status": "failed",
+                "error": str(e),
+            }
+
+    @staticmethod
+    def process_device_chunk(device_configs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Generate remediation for a chunk of batch devices, in order."""
+        return [PlatformService.process_device(device_config) for device_config in device_configs]
+
+    @staticmethod
+    def chunk_device_configs(
+        device_configs: list[dict[str, Any]], workers: int
+    ) -> list[tuple[int, list[dict[str, Any]]]]:
+        """Split devices into (start index, devices) chunks sized by config bytes.
+
+        Chunks target ``batch_chunk_target_bytes`` of config text, shrunk so
+        every worker gets several chunks, and never exceed
+        ``batch_chunk_max_devices``. Small configs are grouped to amortize
+        inter-process overhead while large configs get a chunk of their own.
+        """
+        sizes = [
+            len(device.get("running_config") or "") + len(device.get("intended_config") or "")
+            for device in device_configs
+        ]
+        target_bytes = min(settings.batch_chunk_target_bytes, max(1, sum(sizes) // (workers * 4)))
+
+        chunks: list[tuple[int, list[dict[str, Any]]]] = []
+        start = 0
+        chunk_bytes = 0
+        for index, size in enumerate(sizes):
+            if index > start and (
+                chunk_bytes + size > target_bytes
+                or index - start >= settings.batch_chunk_max_devices
+            ):
+                chunks.append((start, device_configs[start:index]))
+                start = index
+                chunk_bytes = 0
+            chunk_bytes += size
+        if start < len(device_configs):
+            chunks.append((start, device_configs[start:]))
+        return chunks
+
+    @staticmethod
+    async def run_batch_job(job_id: str) -> None:
+        """Process a stored batch job on the worker process pool.
+
+        Devices are chunked and the chunks run concurrently across the pool,
+        at most ``executor.max_batch_concurrency`` at a time.
+        Results are stored at their original device positions and the job's
+        counters and progress are updated as each chunk finishes. A device that
+        fails or times out is recorded as failed without stopping the job.
+
+        If a whole chunk fails, for example because one device hung past the
+        chunk's timeout or crashed its worker process, its devices are run
+        again individually, each with the executor timeout, so only the
+        offending device is recorded as failed.
+        """
+        job_data = await run_storage(storage.get_job, job_id)
+        if job_data is None:
+            return
+
+        await run_storage(storage.update_job, job_id, {"status": "running"})
+        total = job_data["total_devices"]
+        completed = 0
+        failed = 0
+
+        def failed_result(device_config: dict[str, Any], error: Exception) -> dict[str, Any]:
+            return {
+                "device_id": device_config.get("device_id"),
+                "status": "failed",
+                "error": str(error),
+            }
+
+        async def run_device(device_config: dict[str, Any]) -> dict[str, Any]:
+            try:
+                return await executor.run(
+                    PlatformService.process_device,
+                    device_config,
+                    use_process_pool=True,
+                    batch=True,
                 )
-                completed += 1
+            except Exception as e:
+                return failed_result(device_config, e)
 
+        async def run_chunk(
+            start: int, chunk: list[dict[str, Any]]
+        ) -> tuple[int, list[dict[str, Any]]]:
+            try:
+                results = await executor.run(
+                    PlatformService.process_device_chunk,
+                    chunk,
+                    timeout=executor.timeout_seconds * len(chunk),
+                    use_process_pool=True,
+                    batch=True,
+                )
             except Exception as e:
-                results.append(
+                if len(chunk) == 1:
+                    # The device already ran alone with the per-device timeout
+                    results = [failed_result(chunk[0], e)]
+                else:
+                    results = list(await asyncio.gather(*map(run_device, chunk)))
+            return start, results
+
+        try:
+            chunks = PlatformService.chunk_device_configs(
+                job_data["device_configs"], executor.max_processes
+            )
+            for next_chunk in asyncio.as_completed(
+                [run_chunk(start, chunk) for start, chunk in chunks]
+            ):
+                start, results = await next_chunk
+                chunk_failed = sum(1 for result in results if result["status"] == "failed")
+                completed += len(results) - chunk_failed
+                failed += chunk_failed
+                await run_storage(storage.store_job_results, job_id, start, results)
+                await run_storage(
+                    storage.update_job,
+                    job_id,
                     {
-                        "device_id": device_config.get("device_id"),
-                        "status": "failed",
-                        "error": str(e),
-                    }
+                        "progress": 100.0 * (completed + failed) / total,
+                        "completed_devices": completed,
+                        "failed_devices": failed,
+                    },
                 )
-                failed += 1
-
-        # Update job data
-        job_data.update(
-            {
-                "status": "completed",
-                "progress": 100.0,
-                "completed_devices": completed,
-                "failed_devices": failed,
-                "results": results,
-            }
-        )
+        except Exception as e:
+            await run_storage(storage.update_job, job_id, {"status": "failed", "error": str(e)})
+            return
+
+        await run_storage(storage.update_job, job_id, {"status": "completed", "progress": 100.0})
+
+    @staticmethod
+    async def stream_job_results(
+        job_id: str, status_filter: str | None = None
+    ) -> AsyncIterator[str]:
+        """Yield one NDJSON line per device result as results become available.
+
+        Each line carries the device's position in the job as ``index``. The
+        stream ends once the job has finished and every stored result was sent.
+        """
+        pending = None
+        while True:
+            # Read the status first: once it is final, every result is stored
+            job_status = await run_storage(storage.get_job_status, job_id)
+            if job_status is None:
+                return
+            if pending is None:
+                pending = list(range(job_status["total_devices"]))
+
+            finished = job_status["status"] in ("completed", "failed")
+            results = await run_storage(storage.get_job_results, job_id, pending) or {}
+            still_pending = []
+            for index in pending:
+                result = results.get(index)
+                if result is None:
+                    still_pending.append(index)
+                elif status_filter is None or result["status"] == status_filter:
+                    yield json.dumps({"index": index, **result}) + "\n"
+            pending = still_pending
 
-        return job_data
+            if finished or not pending:
+                return
+            await asyncio.sleep(_STREAM_POLL_INTERVAL_SECONDS)
@@ -2,9 +2,25 @@
 
 from typing import Any
 
-from hier_config import Platform, WorkflowRemediation, get_hconfig
+from hier_config import Platform, WorkflowRemediation
 
 from hier_config_api.models.remediation import RemediationSummary, TagRule
+from hier_config_api.utils.bitset import union
+from hier_config_api.utils.cache import content_digest, parse_cache, remediation_cache
+from hier_config_api.utils.tagging import (
+    TreeLine,
+    evaluate_tag_expression,
+    get_tag_matcher,
+    index_tree,
+    iter_tree_lines,
+    leaf_mask,
+    reindex_selected_lines,
+    render_tree_line,
+    select_tree_lines,
+)
+
+# Parse cache namespace of the remediation and rollback trees built by the workflow
+_REMEDIATION_TREES = "remediation"
 
 
 class RemediationService:
@@ -32,99 +48,176 @@ class RemediationService:
         include_tags: list[str] | None = None,
         exclude_tags: list[str] | None = None,
     ) -> dict[str, Any]:
-        """Generate remediation and rollback configurations."""
+        """Generate remediation and rollback configurations.
+
+        Results are memoized by platform and the content digests of both configs,
+        so the ``cached`` key reports whether the cache served this result.
+        """
         platform_enum = RemediationService._get_platform(platform)
-        running_hconfig = get_hconfig(platform_enum, running_config)
-        intended_hconfig = get_hconfig(platform_enum, intended_config)
+        cache_key = (
+            platform_enum.name,
+            content_digest(running_config),
+            content_digest(intended_config),
+        )
+        cached = remediation_cache.get(cache_key)
+        if cached is None:
+            remediation_text, rollback_text, summary = RemediationService._compute_remediation(
+                platform_enum, running_config, intended_config
+            )
+            remediation_cache.put(
+                cache_key,
+                (remediation_text, rollback_text, summary),
+                len(remediation_text) + len(rollback_text),
+            )
+        else:
+            remediation_text, rollback_text, summary = cached
 
-        # Load tag rules if provided
+        tags: dict[str, list[str]] = {}
+        tag_index: dict[str, dict[str, int]] = {}
         if tag_rules:
-            # Convert tag rules to hier_config format
-            # This is simplified - actual implementation would need proper tag loading
-            pass
+            tags, tag_index = RemediationService.tag_remediation(
+                platform, remediation_text, rollback_text, tag_rules
+            )
+
+        filtered_remediation = remediation_text
+        if include_tags or exclude_tags:
+            hconfig = parse_cache.get_hconfig(
+                platform_enum, remediation_text, copy=False, namespace=_REMEDIATION_TREES
+            )
+            lines = list(iter_tree_lines(hconfig))
+            index = tag_index.get("remediation", {})
+            selected = select_tree_lines(
+                lines, RemediationService._filter_mask(lines, index, include_tags, exclude_tags)
+            )
+            filtered_remediation = "\n".join(render_tree_line(line) for line in selected)
+            # Keep the tag line indices aligned with the returned config
+            if tag_rules:
+                tags, tag_index["remediation"] = reindex_selected_lines(selected, index)
+
+        result = {
+            "remediation_config": filtered_remediation,
+            "rollback_config": rollback_text,
+            "summary": summary.model_copy(),
+            "tags": tags,
+            "tag_index": tag_index,
+            "platform": platform,
+            "cached": cached is not None,
+        }
+
+        return result
+
+    @staticmethod
+    def _compute_remediation(
+        platform_enum: Platform, running_config: str, intended_config: str
+    ) -> tuple[str, str, RemediationSummary]:
+        """Run the remediation workflow and return remediation, rollback and summary."""
+        running_hconfig = parse_cache.get_hconfig(platform_enum, running_config, copy=False)
+        intended_hconfig = parse_cache.get_hconfig(platform_enum, intended_config, copy=False)
 
         # Generate remediation and rollback
         workflow = WorkflowRemediation(running_hconfig, intended_hconfig)
         remediation = workflow.remediation_config
         rollback = workflow.rollback_config
 
-        # Calculate summary
-        remediation_lines = str(remediation).splitlines() if remediation else []
-        rollback_lines = str(rollback).splitlines() if rollback else []
+        remediation_text = str(remediation) if remediation else ""
+        rollback_text = str(rollback) if rollback else ""
+
+        # Keep the trees so tagging and filtering the result need no reparse
+        parse_cache.put_hconfig(
+            platform_enum, remediation_text, remediation, namespace=_REMEDIATION_TREES
+        )
+        parse_cache.put_hconfig(
+            platform_enum, rollback_text, rollback, namespace=_REMEDIATION_TREES
+        )
 
         # Count additions, deletions, modifications
-        additions = len([line for line in remediation_lines if line.strip()])
-        deletions = len([line for line in rollback_lines if line.strip()])
+        additions = len([line for line in remediation_text.splitlines() if line.strip()])
+        deletions = len([line for line in rollback_text.splitlines() if line.strip()])
         modifications = 0  # Simplified - would need more logic to detect modifications
 
         summary = RemediationSummary(
             additions=additions, deletions=deletions, modifications=modifications
         )
 
-        # Apply tag filtering if specified
-        filtered_remediation = str(remediation) if remediation else ""
-        if include_tags or exclude_tags:
-            # Simplified tag filtering
-            # In a real implementation, you'd filter based on tags
-            pass
-
-        result = {
-            "remediation_config": filtered_remediation,
-            "rollback_config": str(rollback) if rollback else "",
-            "summary": summary,
-            "tags": {},
-            "platform": platform,
-        }
-
-        return result
+        return remediation_text, rollback_text, summary
 
     @staticmethod
-    def apply_tags(
-        remediation_config: str, tag_rules: list[TagRule]
-    ) -> tuple[str, dict[str, list[str]]]:
-        """Apply tags to remediation configuration."""
-        # Simplified implementation
-        # In a real implementation, you'd apply tags based on patterns
+    def tag_remediation(
+        platform: str, remediation_config: str, rollback_config: str, tag_rules: list[TagRule]
+    ) -> tuple[dict[str, list[str]], dict[str, dict[str, int]]]:
+        """Tag remediation and rollback trees and build their tag bitset index.
+
+        A node gets a rule's tags when its text starts with any of the rule's
+        match patterns, and tagging a section tags every line below it. Returns
+        the remediation tags keyed by line index, and for each of ``remediation``
+        and ``rollback`` a mapping of tag to leaf line bitset.
+        """
+        platform_enum = RemediationService._get_platform(platform)
+        matcher = get_tag_matcher(tag_rules)
         tags: dict[str, list[str]] = {}
-
-        # For each line in remediation, check if it matches any tag rules
-        for rule in tag_rules:
-            for _match_pattern in rule.match_rules:
-                # Check if pattern matches any lines
-                # Add tags to matching lines
-                pass
-
-        return remediation_config, tags
+        tag_index = {}
+        for name, config in (("remediation", remediation_config), ("rollback", rollback_config)):
+            # Tagging mutates the tree, so work on a copy of the cached one
+            hconfig = parse_cache.get_hconfig(platform_enum, config, namespace=_REMEDIATION_TREES)
+            matcher.tag_tree(hconfig)
+            line_tags, tag_index[name] = index_tree(list(iter_tree_lines(hconfig)))
+            if name == "remediation":
+                tags = line_tags
+        return tags, tag_index
 
     @staticmethod
     def filter_remediation(
+        platform: str,
         remediation_config: str,
-        tags: dict[str, list[str]],
+        rollback_config: str,
+        tag_index: dict[str, dict[str, int]],
         include_tags: list[str] | None = None,
         exclude_tags: list[str] | None = None,
-    ) -> tuple[str, RemediationSummary]:
-        """Filter remediation configuration by tags."""
-        lines = remediation_config.splitlines()
-        filtered_lines = []
-
-        for i, line in enumerate(lines):
-            line_tags = tags.get(str(i), [])
-
-            # Check include/exclude logic
-            if include_tags and not any(tag in line_tags for tag in include_tags):
-                continue
-            if exclude_tags and any(tag in line_tags for tag in exclude_tags):
-                continue
-
-            filtered_lines.append(line)
-
-        filtered_config = "\n".join(filtered_lines)
-
-        # Calculate summary
+        tag_expression: str | None = None,
+    ) -> tuple[str, str, RemediationSummary]:
+        """Filter remediation and rollback configurations by tags.
+
+        A leaf line is kept when it carries any of include_tags, none of
+        exclude_tags and matches tag_expression, each evaluated as bitwise
+        operations on the index from tag_remediation. Sections are kept when any
+        line below them is, so the filtered configs keep their hierarchy.
+        """
+        platform_enum = RemediationService._get_platform(platform)
+        filtered = []
+        for name, config in (("remediation", remediation_config), ("rollback", rollback_config)):
+            hconfig = parse_cache.get_hconfig(
+                platform_enum, config, copy=False, namespace=_REMEDIATION_TREES
+            )
+            lines = list(iter_tree_lines(hconfig))
+            mask = RemediationService._filter_mask(
+                lines, tag_index.get(name, {}), include_tags, exclude_tags, tag_expression
+            )
+            filtered.append([render_tree_line(line) for line in select_tree_lines(lines, mask)])
+
+        remediation_lines, rollback_lines = filtered
         summary = RemediationSummary(
-            additions=len(filtered_lines),
-            deletions=0,
+            additions=len([line for line in remediation_lines if line.strip()]),
+            deletions=len([line for line in rollback_lines if line.strip()]),
             modifications=0,
         )
 
-        return filtered_config, summary
+        return "\n".join(remediation_lines), "\n".join(rollback_lines), summary
+
+    @staticmethod
+    def _filter_mask(
+        lines: list[TreeLine],
+        index: dict[str, int],
+        include_tags: list[str] | None = None,
+        exclude_tags: list[str] | None = None,
+        tag_expression: str | None = None,
+    ) -> int:
+        """Return the bitset of leaf lines kept by the tag filters."""
+        all_leaves = leaf_mask(lines)
+        mask = all_leaves
+        if include_tags:
+            mask &= union(index.get(tag, 0) for tag in include_tags)
+        if exclude_tags:
+            mask &= ~union(index.get(tag, 0) for tag in exclude_tags)
+        if tag_expression:
+            mask &= evaluate_tag_expression(tag_expression, index, all_leaves)
+        return mask
@@ -1,15 +1,43 @@
 """Service layer for multi-device reporting."""
 
+import bisect
 import csv
+import heapq
 import io
 import json
-from collections import defaultdict
+import sys
+import zlib
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from typing import Any
 
 import yaml
 
 from hier_config_api.models.report import ChangeDetail, DeviceRemediation, ReportSummary
 from hier_config_api.services.remediation_service import RemediationService
+from hier_config_api.utils.bitset import mask_indices, to_mask, union
+from hier_config_api.utils.cache import approximate_size, content_digest
+
+# Approximate size of each chunk emitted by a streaming export
+_EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Top-level fields of an exported report, and those exported as lists
+_EXPORT_FIELDS = (
+    "devices",
+    "total_devices",
+    "devices_with_changes",
+    "total_changes",
+    "changes_by_tag",
+    "change_details",
+    "computations_saved",
+)
+_LIST_FIELDS = frozenset({"devices", "change_details"})
+
+# Orderings supported when querying report changes
+_CHANGE_SORT_ORDERS = ("first_seen", "device_count_desc", "device_count_asc")
+
+# Approximate bytes of one list slot, array item or dict entry in the report indexes
+_INDEX_ENTRY_BYTES = 8
 
 
 class ReportService:
@@ -17,7 +45,16 @@ class ReportService:
 
     @staticmethod
     def create_report(remediations: list[DeviceRemediation]) -> dict[str, Any]:
-        """Create a report from multiple device remediations."""
+        """Create a report from multiple device remediations.
+
+        Devices sharing the same platform, running config and intended config
+        are remediated once and the result is reused for every one of them.
+
+        Change lines are interned in ``change_table``; devices store their
+        remediation and rollback as arrays of change IDs, and each entry of
+        ``change_details`` stores the affected device positions as an array.
+        Text is only rebuilt on demand (see ``device_view``).
+        """
         report_data: dict[str, Any] = {
             "devices": [],
             "total_devices": len(remediations),
@@ -25,61 +62,357 @@ class ReportService:
             "total_changes": 0,
             "changes_by_tag": {},
             "change_details": [],
+            "computations_saved": 0,
+            "change_table": [],
+            "change_ids": {},
+            "device_positions": {},
         }
 
-        # Track changes across devices
-        change_tracker: dict[str, dict[str, Any]] = defaultdict(
-            lambda: {"count": 0, "devices": [], "tags": []}
-        )
+        # Interned remediation and rollback by (platform, running digest, intended digest)
+        workload_results: dict[tuple[str, str, str], tuple[array[int], array[int], str]] = {}
 
-        for device_rem in remediations:
-            # Generate remediation for this device
-            remediation_result = RemediationService.generate_remediation(
-                platform=device_rem.platform,
-                running_config=device_rem.running_config,
-                intended_config=device_rem.intended_config,
-            )
+        # Device positions by change ID
+        change_devices: dict[int, array[int]] = {}
 
-            remediation_config = remediation_result["remediation_config"]
-            has_changes = bool(remediation_config.strip())
+        for device_index, device_rem in enumerate(remediations):
+            # Generate remediation once per distinct workload
+            workload_key = _workload_key(device_rem)
+            workload = workload_results.get(workload_key)
+            if workload is None:
+                remediation_result = RemediationService.generate_remediation(
+                    platform=device_rem.platform,
+                    running_config=device_rem.running_config,
+                    intended_config=device_rem.intended_config,
+                )
+                workload = (
+                    _intern_lines(report_data, remediation_result["remediation_config"]),
+                    _intern_lines(report_data, remediation_result["rollback_config"]),
+                    content_digest(remediation_result["remediation_config"]),
+                )
+                workload_results[workload_key] = workload
+            remediation_ids, rollback_ids, fingerprint = workload
+
+            # Blank lines are kept in the ID arrays so text can be rebuilt exactly
+            change_table = report_data["change_table"]
+            has_changes = any(change_table[change_id].strip() for change_id in remediation_ids)
 
             if has_changes:
                 report_data["devices_with_changes"] += 1
 
             # Track changes
-            changes = remediation_config.splitlines()
-            report_data["total_changes"] += len(changes)
+            report_data["total_changes"] += len(remediation_ids)
 
-            # Store device data
+            # Store device data; identical workloads share the same arrays
             device_data = {
                 "device_id": device_rem.device_id,
                 "platform": device_rem.platform,
                 "has_changes": has_changes,
-                "change_count": len(changes),
-                "remediation": remediation_config,
-                "rollback": remediation_result["rollback_config"],
+                "change_count": len(remediation_ids),
+                "remediation_ids": remediation_ids,
+                "rollback_ids": rollback_ids,
+                "fingerprint": fingerprint,
             }
             report_data["devices"].append(device_data)
+            report_data["device_positions"][device_rem.device_id] = device_index
 
             # Track individual changes
-            for change in changes:
-                if change.strip():
-                    change_tracker[change]["count"] += 1
-                    change_tracker[change]["devices"].append(device_rem.device_id)
+            for change_id in remediation_ids:
+                if change_table[change_id].strip():
+                    change_devices.setdefault(change_id, array("I")).append(device_index)
+
+        report_data["computations_saved"] = len(remediations) - len(workload_results)
 
         # Convert change tracker to change details
         report_data["change_details"] = [
-            {
-                "change_text": change_text,
-                "device_count": data["count"],
-                "device_ids": data["devices"],
-                "tags": data["tags"],
-            }
-            for change_text, data in change_tracker.items()
+            {"change_id": change_id, "device_indices": device_indices, "tags": []}
+            for change_id, device_indices in change_devices.items()
         ]
+        ReportService.build_change_index(report_data)
+        ReportService.build_device_matrix(report_data)
 
         return report_data
 
+    @staticmethod
+    def remediate_devices(
+        remediations: list[DeviceRemediation],
+    ) -> tuple[list[tuple[str, str]], int]:
+        """Generate remediation and rollback text for each device.
+
+        Like create_report, identical workloads are remediated once.
+
+        Returns:
+            The (remediation, rollback) text per device and the number of
+            devices that reused another device's result.
+        """
+        workload_results: dict[tuple[str, str, str], tuple[str, str]] = {}
+        results = []
+        for device_rem in remediations:
+            workload_key = _workload_key(device_rem)
+            result = workload_results.get(workload_key)
+            if result is None:
+                remediation_result = RemediationService.generate_remediation(
+                    platform=device_rem.platform,
+                    running_config=device_rem.running_config,
+                    intended_config=device_rem.intended_config,
+                )
+                result = (
+                    remediation_result["remediation_config"],
+                    remediation_result["rollback_config"],
+                )
+                workload_results[workload_key] = result
+            results.append(result)
+        return results, len(remediations) - len(workload_results)
+
+    @staticmethod
+    def upsert_devices(
+        report_data: dict[str, Any],
+        remediations: list[DeviceRemediation],
+        results: list[tuple[str, str]],
+    ) -> dict[str, int]:
+        """Add devices to a report, replacing devices with the same device_id.
+
+        Aggregates, change indexes and the device matrix are updated in place
+        for the affected devices only.
+
+        Args:
+            results: The (remediation, rollback) text per device, as returned by
+                remediate_devices.
+
+        Returns:
+            The devices added and replaced, and the approximate change of the
+            report's size in bytes as ``size_delta``.
+        """
+        added = replaced = size_delta = 0
+        change_table = report_data["change_table"]
+        interned = len(change_table)
+        for device_rem, (remediation_text, rollback_text) in zip(
+            remediations, results, strict=True
+        ):
+            slot = report_data["device_positions"].get(device_rem.device_id)
+            if slot is None:
+                slot = len(report_data["devices"])
+                report_data["devices"].append(None)
+                report_data["device_positions"][device_rem.device_id] = slot
+                report_data["total_devices"] += 1
+                added += 1
+            else:
+                size_delta += _detach_device(report_data, slot)
+                replaced += 1
+            size_delta += _attach_device(
+                report_data,
+                slot,
+                {
+                    "device_id": device_rem.device_id,
+                    "platform": device_rem.platform,
+                    "remediation_ids": _intern_lines(report_data, remediation_text),
+                    "rollback_ids": _intern_lines(report_data, rollback_text),
+                    "fingerprint": content_digest(remediation_text),
+                },
+            )
+        # Lines are kept in the change table and as keys of change_ids
+        size_delta += sum(
+            approximate_size(line) + 2 * _INDEX_ENTRY_BYTES for line in change_table[interned:]
+        )
+        return {"devices_added": added, "devices_replaced": replaced, "size_delta": size_delta}
+
+    @staticmethod
+    def remove_devices(report_data: dict[str, Any], device_ids: list[str]) -> tuple[int, int]:
+        """Remove devices from a report.
+
+        Removed devices leave an empty slot so the positions of other devices,
+        which the change indexes refer to, stay valid.
+
+        Returns:
+            How many devices were removed and the approximate change of the
+            report's size in bytes.
+        """
+        removed = size_delta = 0
+        for device_id in device_ids:
+            slot = report_data["device_positions"].pop(device_id, None)
+            if slot is None:
+                continue
+            size_delta += _detach_device(report_data, slot) - _INDEX_ENTRY_BYTES
+            report_data["total_devices"] -= 1
+            removed += 1
+        return removed, size_delta
+
+    @staticmethod
+    def build_change_index(report_data: dict[str, Any]) -> None:
+        """Precompute the change orderings and tag postings used by query_changes.
+
+        ``by_device_count`` and ``by_tag_count`` hold change positions sorted by
+        descending device count (ties in first-seen order), so a ``min_devices``
+        filter selects a prefix found by binary search. ``by_tag`` holds each
+        tag's change positions in first-seen order.
+        """
+        changes = report_data["change_details"]
+        count_order = _count_order(changes)
+
+        by_tag: dict[str, array[int]] = {}
+        for position, change in enumerate(changes):
+            for tag in change["tags"]:
+                by_tag.setdefault(tag, array("I")).append(position)
+
+        report_data["change_index"] = {
+            "by_device_count": array("I", sorted(range(len(changes)), key=count_order)),
+            "by_tag": by_tag,
+            "by_tag_count": {
+                tag: array("I", sorted(positions, key=count_order))
+                for tag, positions in by_tag.items()
+            },
+        }
+
+    @staticmethod
+    def device_view(report_data: dict[str, Any], device: dict[str, Any]) -> dict[str, Any]:
+        """Rebuild a device entry with its remediation and rollback text."""
+        change_table = report_data["change_table"]
+        return {
+            "device_id": device["device_id"],
+            "platform": device["platform"],
+            "has_changes": device["has_changes"],
+            "change_count": device["change_count"],
+            "remediation": "\n".join(change_table[i] for i in device["remediation_ids"]),
+            "rollback": "\n".join(change_table[i] for i in device["rollback_ids"]),
+        }
+
+    @staticmethod
+    def change_view(report_data: dict[str, Any], change: dict[str, Any]) -> dict[str, Any]:
+        """Rebuild a change entry with its text and affected device IDs."""
+        devices = report_data["devices"]
+        return {
+            "change_text": report_data["change_table"][change["change_id"]],
+            "device_count": len(change["device_indices"]),
+            "device_ids": [devices[i]["device_id"] for i in change["device_indices"]],
+            "tags": change["tags"],
+        }
+
+    @staticmethod
+    def build_device_matrix(report_data: dict[str, Any]) -> None:
+        """Build the sparse device x change matrix used by query_devices.
+
+        Each change and each platform is stored as a bitset of device positions
+        (a Python int), so set queries run as a handful of bitwise operations
+        instead of loops over devices.
+        """
+        devices = report_data["devices"]
+        changes = report_data["change_details"]
+
+        platform_indices: dict[str, list[int]] = {}
+        for device_index, device in enumerate(devices):
+            platform_indices.setdefault(device["platform"], []).append(device_index)
+
+        report_data["device_matrix"] = {
+            "change_masks": [to_mask(change["device_indices"]) for change in changes],
+            "change_positions": {
+                report_data["change_table"][change["change_id"]]: position
+                for position, change in enumerate(changes)
+            },
+            "platform_masks": {
+                platform: to_mask(indices) for platform, indices in platform_indices.items()
+            },
+        }
+
+    @staticmethod
+    def query_devices(
+        report_data: dict[str, Any],
+        all_of: list[str] | None = None,
+        any_of: list[str] | None = None,
+        none_of: list[str] | None = None,
+        platforms: list[str] | None = None,
+        top_changes: int = 0,
+    ) -> dict[str, Any]:
+        """Select devices by the changes they have and group them by platform.
+
+        Args:
+            all_of: Change lines every selected device must have.
+            any_of: Change lines of which a selected device must have at least one.
+            none_of: Change lines a selected device must not have.
+            platforms: Only select devices of these platforms.
+            top_changes: Number of most common changes among the selected
+                devices to return.
+        """
+        devices = report_data["devices"]
+        matrix = report_data["device_matrix"]
+        change_masks = matrix["change_masks"]
+        change_positions = matrix["change_positions"]
+        platform_masks = matrix["platform_masks"]
+
+        def change_mask(change_text: str) -> int:
+            position = change_positions.get(change_text)
+            return 0 if position is None else int(change_masks[position])
+
+        # Every device in the report belongs to exactly one platform
+        selected = union(platform_masks.values())
+        if platforms:
+            selected &= union(platform_masks.get(platform, 0) for platform in platforms)
+        for change_text in all_of or []:
+            selected &= change_mask(change_text)
+        if any_of:
+            selected &= union(change_mask(change_text) for change_text in any_of)
+        if none_of:
+            selected &= ~union(change_mask(change_text) for change_text in none_of)
+
+        by_platform = {
+            platform: (selected & mask).bit_count() for platform, mask in platform_masks.items()
+        }
+        # Only the requested number of changes is ranked, first seen first on ties
+        ranked = (
+            heapq.nlargest(
+                top_changes,
+                (
+                    ((selected & mask).bit_count(), position)
+                    for position, mask in enumerate(change_masks)
+                ),
+                key=lambda item: (item[0], -item[1]),
+            )
+            if top_changes > 0
+            else []
+        )
+        changes = report_data["change_details"]
+        return {
+            "device_count": selected.bit_count(),
+            "device_ids": [devices[i]["device_id"] for i in mask_indices(selected)],
+            "by_platform": {platform: count for platform, count in by_platform.items() if count},
+            "top_changes": [
+                {
+                    "change_text": report_data["change_table"][changes[position]["change_id"]],
+                    "device_count": count,
+                }
+                for count, position in ranked
+                if count
+            ],
+        }
+
+    @staticmethod
+    def get_cohorts(report_data: dict[str, Any], min_devices: int = 1) -> list[dict[str, Any]]:
+        """Group devices by platform and the fingerprint of their remediation.
+
+        The fingerprint is the SHA-256 digest of the remediation text, so devices
+        in a cohort run the same platform and need exactly the same changes.
+        Cohorts are sorted by descending device count, and each carries its
+        remediation text once.
+        """
+        cohort_devices: dict[tuple[str, str], list[dict[str, Any]]] = {}
+        for device in report_data["devices"]:
+            if device is not None:
+                key = (device["platform"], device["fingerprint"])
+                cohort_devices.setdefault(key, []).append(device)
+
+        change_table = report_data["change_table"]
+        return [
+            {
+                "fingerprint": fingerprint,
+                "platform": platform,
+                "device_count": len(devices),
+                "device_ids": [device["device_id"] for device in devices],
+                "remediation": "\n".join(change_table[i] for i in devices[0]["remediation_ids"]),
+            }
+            for (platform, fingerprint), devices in sorted(
+                cohort_devices.items(), key=lambda item: -len(item[1])
+            )
+            if len(devices) >= min_devices
+        ]
+
     @staticmethod
     def get_summary(report_data: dict[str, Any]) -> ReportSummary:
         """Get summary statistics from report."""
@@ -88,6 +421,7 @@ class ReportService:
             devices_with_changes=report_data["devices_with_changes"],
             total_changes=report_data["total_changes"],
             changes_by_tag=report_data.get("changes_by_tag", {}),
+            computations_saved=report_data.get("computations_saved", 0),
         )
 
     @staticmethod
@@ -97,61 +431,375 @@ class ReportService:
         min_devices: int = 1,
     ) -> list[ChangeDetail]:
         """Get detailed change analysis."""
-        changes = report_data.get("change_details", [])
+        changes, _, _ = ReportService.query_changes(
+            report_data, tag_filter=tag_filter, min_devices=min_devices
+        )
+        return changes
 
-        # Filter by tag if specified
+    @staticmethod
+    def query_changes(
+        report_data: dict[str, Any],
+        tag_filter: str | None = None,
+        min_devices: int = 1,
+        sort: str = "first_seen",
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[ChangeDetail], int, str | None]:
+        """Get one page of changes using the precomputed change index.
+
+        Args:
+            sort: ``first_seen``, ``device_count_desc`` or ``device_count_asc``.
+            cursor: ``next_cursor`` of the previous page, requested with the
+                same filters and sort.
+            limit: Maximum number of changes to return (all when None).
+
+        Returns:
+            The page of changes, the number of changes matching the filters and
+            the cursor of the next page (None on the last page).
+        """
+        if sort not in _CHANGE_SORT_ORDERS:
+            raise ValueError(f"Unsupported sort: {sort}")
+        try:
+            offset = int(cursor) if cursor else 0
+        except ValueError as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if offset < 0:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+        # Changes of removed devices stay indexed with a device count of zero
+        min_devices = max(min_devices, 1)
+        changes = report_data["change_details"]
+        index = report_data["change_index"]
         if tag_filter:
-            changes = [c for c in changes if tag_filter in c.get("tags", [])]
+            by_count = index["by_tag_count"].get(tag_filter, array("I"))
+        else:
+            by_count = index["by_device_count"]
+
+        # Changes on at least min_devices devices are a prefix of the count ordering
+        matched = bisect.bisect_right(
+            by_count, -min_devices, key=lambda p: -len(changes[p]["device_indices"])
+        )
+        stop = matched if limit is None else min(matched, offset + limit)
 
-        # Filter by minimum devices
-        changes = [c for c in changes if c["device_count"] >= min_devices]
+        if sort == "device_count_desc":
+            positions: Iterable[int] = by_count[offset:stop]
+        elif sort == "device_count_asc":
+            positions = (by_count[matched - 1 - i] for i in range(offset, stop))
+        else:
+            # Walk first-seen order; the cursor is the next position to inspect
+            first_seen: Sequence[int] = (
+                index["by_tag"].get(tag_filter, array("I")) if tag_filter else range(len(changes))
+            )
+            page: list[int] = []
+            next_offset = offset
+            while next_offset < len(first_seen) and (limit is None or len(page) < limit):
+                position = first_seen[next_offset]
+                if len(changes[position]["device_indices"]) >= min_devices:
+                    page.append(position)
+                next_offset += 1
+            while next_offset < len(first_seen) and (
+                len(changes[first_seen[next_offset]]["device_indices"]) < min_devices
+            ):
+                next_offset += 1
+            next_cursor = str(next_offset) if next_offset < len(first_seen) else None
+            return ReportService._change_details(report_data, page), matched, next_cursor
 
-        # Convert to ChangeDetail objects
+        next_cursor = str(stop) if stop < matched else None
+        return ReportService._change_details(report_data, positions), matched, next_cursor
+
+    @staticmethod
+    def _change_details(
+        report_data: dict[str, Any], positions: Iterable[int]
+    ) -> list[ChangeDetail]:
+        """Build ChangeDetail objects for the changes at positions."""
+        changes = report_data["change_details"]
         return [
-            ChangeDetail(
-                change_text=c["change_text"],
-                device_count=c["device_count"],
-                device_ids=c["device_ids"],
-                tags=c.get("tags", []),
-            )
-            for c in changes
+            ChangeDetail(**ReportService.change_view(report_data, changes[position]))
+            for position in positions
         ]
 
     @staticmethod
     def export_report(report_data: dict[str, Any], format_type: str = "json") -> str:
         """Export report in specified format."""
-        if format_type == "json":
-            return json.dumps(report_data, indent=2)
+        return "".join(ReportService.iter_export(report_data, format_type))
 
-        elif format_type == "yaml":
-            return yaml.dump(report_data, default_flow_style=False)
+    @staticmethod
+    def iter_export(report_data: dict[str, Any], format_type: str = "json") -> Iterator[str]:
+        """Export report in specified format as a stream of text chunks.
 
+        The export is generated device by device (or row by row for CSV), so
+        memory use does not grow with the report size.
+        """
+        if format_type == "json":
+            chunks = ReportService._iter_json(report_data)
+        elif format_type == "yaml":
+            chunks = ReportService._iter_yaml(report_data)
         elif format_type == "csv":
-            output = io.StringIO()
-            writer = csv.writer(output)
+            chunks = ReportService._iter_csv(report_data)
+        else:
+            raise ValueError(f"Unsupported format: {format_type}")
+
+        return _buffer_chunks(chunks)
+
+    @staticmethod
+    def gzip_export(chunks: Iterable[str]) -> Iterator[bytes]:
+        """Gzip-compress a stream of export chunks on the fly."""
+        compressor = zlib.compressobj(wbits=31)  # 31 selects the gzip container
+        for chunk in chunks:
+            compressed = compressor.compress(chunk.encode())
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    @staticmethod
+    def _export_field(report_data: dict[str, Any], key: str) -> Any:
+        """Return an exported field, rebuilding list entries lazily."""
+        if key == "devices":
+            return (
+                ReportService.device_view(report_data, d)
+                for d in report_data["devices"]
+                if d is not None
+            )
+        if key == "change_details":
+            return (
+                ReportService.change_view(report_data, c)
+                for c in report_data["change_details"]
+                if c["device_indices"]
+            )
+        return report_data[key]
+
+    @staticmethod
+    def _iter_json(report_data: dict[str, Any]) -> Iterator[str]:
+        """Yield the JSON document of a report one top-level key or list item at a time.
+
+        The output is identical to ``json.dumps(document, indent=2)``.
+        """
+        yield "{"
+        for position, key in enumerate(_EXPORT_FIELDS):
+            yield ("," if position else "") + f"\n  {json.dumps(key)}: "
+            value = ReportService._export_field(report_data, key)
+            if key not in _LIST_FIELDS:
+                yield json.dumps(value, indent=2).replace("\n", "\n  ")
+                continue
+            empty = True
+            for item in value:
+                item_json = json.dumps(item, indent=2).replace("\n", "\n    ")
+                yield ("[" if empty else ",") + "\n    " + item_json
+                empty = False
+            yield "[]" if empty else "\n  ]"
+        yield "\n}"
+
+    @staticmethod
+    def _iter_yaml(report_data: dict[str, Any]) -> Iterator[str]:
+        """Yield the YAML document of a report one top-level key or list item at a time."""
+        for key in sorted(_EXPORT_FIELDS):
+            value = ReportService._export_field(report_data, key)
+            if key not in _LIST_FIELDS:
+                yield yaml.dump({key: value}, default_flow_style=False)
+                continue
+            empty = True
+            for item in value:
+                if empty:
+                    yield f"{key}:\n"
+                yield yaml.dump([item], default_flow_style=False)
+                empty = False
+            if empty:
+                yield yaml.dump({key: []}, default_flow_style=False)
+
+    @staticmethod
+    def _iter_csv(report_data: dict[str, Any]) -> Iterator[str]:
+        """Yield the CSV export of a report one row at a time."""
+        output = io.StringIO()
+        writer = csv.writer(output)
+
+        def flush() -> str:
+            row = output.getvalue()
+            output.seek(0)
+            output.truncate()
+            return row
 
-            # Write header
+        # Write header
+        writer.writerow(
+            ["Device ID", "Platform", "Has Changes", "Change Count", "Remediation Summary"]
+        )
+        yield flush()
+
+        # Write device rows
+        for device in ReportService._export_field(report_data, "devices"):
             writer.writerow(
-                ["Device ID", "Platform", "Has Changes", "Change Count", "Remediation Summary"]
+                [
+                    device["device_id"],
+                    device["platform"],
+                    device["has_changes"],
+                    device["change_count"],
+                    (
+                        device["remediation"][:50] + "..."
+                        if len(device["remediation"]) > 50
+                        else device["remediation"]
+                    ),
+                ]
             )
+            yield flush()
 
-            # Write device rows
-            for device in report_data.get("devices", []):
-                writer.writerow(
-                    [
-                        device["device_id"],
-                        device["platform"],
-                        device["has_changes"],
-                        device["change_count"],
-                        (
-                            device["remediation"][:50] + "..."
-                            if len(device["remediation"]) > 50
-                            else device["remediation"]
-                        ),
-                    ]
-                )
 
-            return output.getvalue()
+def _buffer_chunks(chunks: Iterable[str], chunk_size: int = _EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Coalesce small text chunks into pieces of roughly chunk_size characters."""
+    buffer: list[str] = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
 
-        else:
-            raise ValueError(f"Unsupported format: {format_type}")
+
+def _workload_key(device_rem: DeviceRemediation) -> tuple[str, str, str]:
+    """Return the key identifying devices that share the same remediation."""
+    return (
+        device_rem.platform.lower(),
+        content_digest(device_rem.running_config),
+        content_digest(device_rem.intended_config),
+    )
+
+
+def _intern_lines(report_data: dict[str, Any], text: str) -> "array[int]":
+    """Intern the lines of text in the report's change table and return their IDs."""
+    change_ids = report_data["change_ids"]
+    ids = array("I")
+    for line in text.splitlines():
+        change_id = change_ids.get(line)
+        if change_id is None:
+            change_id = change_ids[line] = len(change_ids)
+            report_data["change_table"].append(line)
+        ids.append(change_id)
+    return ids
+
+
+def _count_order(changes: list[dict[str, Any]]) -> Callable[[int], tuple[int, int]]:
+    """Return the sort key of the device-count change indexes."""
+    return lambda position: (-len(changes[position]["device_indices"]), position)
+
+
+def _device_change_positions(
+    report_data: dict[str, Any], remediation_ids: "array[int]"
+) -> list[int]:
+    """Return the change positions of a device's non-blank remediation lines."""
+    change_table = report_data["change_table"]
+    change_positions = report_data["device_matrix"]["change_positions"]
+    return [
+        change_positions[change_table[change_id]]
+        for change_id in remediation_ids
+        if change_table[change_id].strip()
+    ]
+
+
+def _reindex_changes(
+    report_data: dict[str, Any], positions: set[int], update: Callable[[], None]
+) -> None:
+    """Run update, which changes device counts of positions, keeping the count indexes sorted."""
+    changes = report_data["change_details"]
+    index = report_data["change_index"]
+    key = _count_order(changes)
+
+    def sorted_indexes(position: int) -> list["array[int]"]:
+        tags = changes[position]["tags"]
+        return [index["by_device_count"], *(index["by_tag_count"][tag] for tag in tags)]
+
+    for position in positions:
+        for sorted_index in sorted_indexes(position):
+            del sorted_index[bisect.bisect_left(sorted_index, key(position), key=key)]
+    update()
+    for position in positions:
+        for sorted_index in sorted_indexes(position):
+            bisect.insort(sorted_index, position, key=key)
+
+
+def _device_size(device: dict[str, Any]) -> int:
+    """Estimate the memory held by a device entry, excluding shared platform names."""
+    return sys.getsizeof(device) + sum(
+        sys.getsizeof(device[key])
+        for key in ("device_id", "remediation_ids", "rollback_ids", "fingerprint")
+    )
+
+
+def _detach_device(report_data: dict[str, Any], slot: int) -> int:
+    """Remove the device at slot from the report aggregates and indexes.
+
+    Returns the approximate change of the report's size in bytes.
+    """
+    device = report_data["devices"][slot]
+    changes = report_data["change_details"]
+    matrix = report_data["device_matrix"]
+    positions = _device_change_positions(report_data, device["remediation_ids"])
+    bit = 1 << slot
+
+    def update() -> None:
+        for position in positions:
+            device_indices = changes[position]["device_indices"]
+            del device_indices[bisect.bisect_left(device_indices, slot)]
+        for position in set(positions):
+            matrix["change_masks"][position] &= ~bit
+
+    _reindex_changes(report_data, set(positions), update)
+
+    platform_masks = matrix["platform_masks"]
+    platform_masks[device["platform"]] &= ~bit
+    if not platform_masks[device["platform"]]:
+        del platform_masks[device["platform"]]
+
+    report_data["devices_with_changes"] -= device["has_changes"]
+    report_data["total_changes"] -= device["change_count"]
+    report_data["devices"][slot] = None
+    return -_device_size(device) - len(positions) * _INDEX_ENTRY_BYTES
+
+
+def _attach_device(report_data: dict[str, Any], slot: int, device: dict[str, Any]) -> int:
+    """Add a device at an empty slot to the report aggregates and indexes.
+
+    Returns the approximate change of the report's size in bytes, not counting
+    newly interned change lines.
+    """
+    changes = report_data["change_details"]
+    matrix = report_data["device_matrix"]
+    change_table = report_data["change_table"]
+    remediation_ids = device["remediation_ids"]
+    size_delta = 0
+
+    # Register change lines the report has not seen yet with no devices
+    for change_id in remediation_ids:
+        change_text = change_table[change_id]
+        if change_text.strip() and change_text not in matrix["change_positions"]:
+            position = len(changes)
+            change = {"change_id": change_id, "device_indices": array("I"), "tags": []}
+            changes.append(change)
+            # The change entry plus its slots in the matrix and the count index
+            size_delta += approximate_size(change) + 4 * _INDEX_ENTRY_BYTES
+            matrix["change_positions"][change_text] = position
+            matrix["change_masks"].append(0)
+            # A change without devices sorts last in the count ordering
+            report_data["change_index"]["by_device_count"].append(position)
+
+    positions = _device_change_positions(report_data, remediation_ids)
+    bit = 1 << slot
+
+    def update() -> None:
+        for position in positions:
+            bisect.insort(changes[position]["device_indices"], slot)
+        for position in set(positions):
+            matrix["change_masks"][position] |= bit
+
+    _reindex_changes(report_data, set(positions), update)
+
+    platform_masks = matrix["platform_masks"]
+    platform_masks[device["platform"]] = platform_masks.get(device["platform"], 0) | bit
+
+    device["has_changes"] = bool(positions)
+    device["change_count"] = len(remediation_ids)
+    report_data["devices_with_changes"] += device["has_changes"]
+    report_data["total_changes"] += device["change_count"]
+    report_data["devices"][slot] = device
+    return size_delta + _device_size(device) + len(positions) * _INDEX_ENTRY_BYTES
@@ -0,0 +1,105 @@
+"""Application settings loaded from environment variables."""
+
+import os
+from typing import Literal
+
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime settings for hier-config-api.
+
+    Every field can be overridden with an environment variable prefixed with
+    ``HIER_CONFIG_API_`` (e.g. ``HIER_CONFIG_API_PARSE_CACHE_MAX_BYTES``).
+    """
+
+    model_config = SettingsConfigDict(env_prefix="HIER_CONFIG_API_")
+
+    parse_cache_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        description="Approximate memory budget for cached parsed configs (0 disables the cache)",
+        ge=0,
+    )
+    remediation_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Approximate memory budget for cached remediation results (0 disables)",
+        ge=0,
+    )
+    remediation_cache_ttl_seconds: float = Field(
+        default=300.0,
+        description="Seconds a cached remediation result stays valid",
+        gt=0,
+    )
+    tag_matcher_cache_max_bytes: int = Field(
+        default=16 * 1024 * 1024,
+        description="Approximate memory budget for compiled tag rule sets (0 disables the cache)",
+        ge=0,
+    )
+    executor_max_threads: int = Field(
+        default=min(32, (os.cpu_count() or 1) + 4),
+        description="Worker threads for small CPU-bound service calls",
+        ge=1,
+    )
+    executor_max_processes: int = Field(
+        default=os.cpu_count() or 1,
+        description="Worker processes for large CPU-bound service calls",
+        ge=1,
+    )
+    executor_process_threshold_bytes: int = Field(
+        default=1024 * 1024,
+        description="Input size at which service calls move to the process pool (0 disables)",
+        ge=0,
+    )
+    executor_max_concurrency: int = Field(
+        default=2 * (os.cpu_count() or 1),
+        description="Maximum number of service calls executing at once",
+        ge=1,
+    )
+    executor_max_batch_concurrency: int = Field(
+        default=max(1, (os.cpu_count() or 1) - 1),
+        description="Maximum number of batch job chunks executing at once",
+        ge=1,
+    )
+    executor_timeout_seconds: float = Field(
+        default=120.0,
+        description="Seconds a request waits for a service call before failing",
+        gt=0,
+    )
+    batch_chunk_target_bytes: int = Field(
+        default=512 * 1024,
+        description="Config bytes per chunk of devices dispatched to a batch worker",
+        ge=1,
+    )
+    batch_chunk_max_devices: int = Field(
+        default=64,
+        description="Maximum devices per chunk dispatched to a batch worker",
+        ge=1,
+    )
+    storage_backend: Literal["memory", "sqlite"] = Field(
+        default="memory",
+        description="Where reports, jobs and remediations are kept (memory or sqlite)",
+    )
+    storage_memory_max_bytes: int = Field(
+        default=256 * 1024 * 1024,
+        description="Approximate memory budget of each in-memory storage collection",
+        ge=1,
+    )
+    storage_ttl_seconds: float = Field(
+        default=24 * 60 * 60,
+        description="Seconds a stored record is kept after it was last written",
+        gt=0,
+    )
+    storage_blob_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="Memory budget for decompressed config texts read from storage (0 disables)",
+        ge=0,
+    )
+    storage_sqlite_path: str = Field(
+        default="hier_config_api.sqlite3",
+        description="Database file of the sqlite storage backend",
+    )
+
+
+# Global settings instance
+settings = Settings()
@@ -0,0 +1,31 @@
+"""Integer bitsets used to index reports and tagged remediation lines."""
+
+from collections.abc import Iterable, Iterator
+
+
+def to_mask(indices: Iterable[int]) -> int:
+    """Build a bitset with the bits at indices set."""
+    bits = bytearray()
+    for index in indices:
+        byte = index >> 3
+        if byte >= len(bits):
+            bits.extend(bytes(byte + 1 - len(bits)))
+        bits[byte] |= 1 << (index & 7)
+    return int.from_bytes(bits, "little")
+
+
+def mask_indices(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits of mask in ascending order."""
+    for byte_index, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, "little")):
+        while byte:
+            low_bit = byte & -byte
+            yield (byte_index << 3) + low_bit.bit_length() - 1
+            byte ^= low_bit
+
+
+def union(masks: Iterable[int]) -> int:
+    """Return the bitwise OR of masks."""
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
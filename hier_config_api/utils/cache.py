@@ -0,0 +1,252 @@
+"""Content-addressed caches shared by the service layer."""
+
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from hier_config import HConfig, Platform, get_hconfig
+from pydantic import BaseModel
+
+from hier_config_api.settings import settings
+
+# Rough in-memory cost of one parsed line (HConfigChild object, tag/comment sets,
+# children index). Parsed trees are ~40x larger than their source text.
+_LINE_OVERHEAD_BYTES = 1024
+
+
+def content_digest(text: str) -> str:
+    """Return the SHA-256 hex digest of a text."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def approximate_size(data: Any) -> int:
+    """Estimate the memory held by a record, counting shared objects once."""
+    seen: set[int] = set()
+    size = 0
+    stack = [data]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, BaseModel):
+            stack.append(obj.__dict__)
+    return size
+
+
+def _estimate_size(config_text: str) -> int:
+    """Estimate the memory held by the parsed tree of config_text."""
+    return len(config_text) + (config_text.count("\n") + 1) * _LINE_OVERHEAD_BYTES
+
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by approximate size in bytes.
+
+    Entries optionally expire ``ttl_seconds`` after they were last stored or
+    resized.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float | None = None,
+        on_remove: Callable[[Any], object] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache with an approximate memory budget.
+
+        on_remove, if given, is called with each value that is evicted, expires,
+        is replaced, is cleared or is too large to be stored. clock returns the
+        current time in seconds for the TTL.
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_remove = on_remove
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[Any, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry[2]):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> bool:
+        """Store a value and evict least recently used entries over budget.
+
+        Returns False, leaving any previous value of key in place, if the value
+        alone is larger than max_bytes and was therefore not stored.
+        """
+        if size > self.max_bytes:
+            if self.on_remove is not None:
+                self.on_remove(value)
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, self._clock())
+            self._current_bytes += size
+            self._evict()
+            return True
+
+    def resize(self, key: Hashable, delta: int) -> bool:
+        """Adjust the size of an entry whose value was modified in place.
+
+        The entry becomes the most recently used one and its TTL restarts.
+        Returns False if the key is not cached.
+        """
+        return self._adjust(key, delta, None)
+
+    def replace(self, key: Hashable, value: Any, delta: int) -> bool:
+        """Swap the value of an entry for a modified copy that is delta bytes larger.
+
+        Like resize, but the previous value is left untouched for readers still
+        holding it. Returns False if the key is not cached.
+        """
+        return self._adjust(key, delta, (value,))
+
+    def _adjust(self, key: Hashable, delta: int, new_value: tuple[Any] | None) -> bool:
+        """Resize an entry, optionally swapping its value, and restart its TTL."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry[2]):
+                return False
+            value = entry[0] if new_value is None else new_value[0]
+            self._entries[key] = (value, entry[1] + delta, self._clock())
+            self._entries.move_to_end(key)
+            self._current_bytes += delta
+            self._evict(keep=key)
+            return True
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters."""
+        with self._lock:
+            if self.on_remove is not None:
+                for value, _, _ in self._entries.values():
+                    self.on_remove(value)
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return cache occupancy and hit/miss counters."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "current_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self, keep: Hashable | None = None) -> None:
+        """Drop expired and least recently used entries; the caller must hold the lock.
+
+        Expired entries are only found at the least recently used end, so one
+        that was read recently is dropped when it is next read instead.
+        """
+        while self._entries:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            if self._is_expired(self._entries[oldest][2]):
+                self._remove(oldest)
+            elif self._current_bytes > self.max_bytes:
+                self._remove(oldest)
+                self.evictions += 1
+            else:
+                break
+
+    def _is_expired(self, stored_at: float) -> bool:
+        """Check whether an entry stored at stored_at has outlived the TTL."""
+        return self.ttl_seconds is not None and self._clock() - stored_at > self.ttl_seconds
+
+    def _remove(self, key: Hashable) -> None:
+        """Remove an entry; the caller must hold the lock."""
+        value, size, _ = self._entries.pop(key)
+        self._current_bytes -= size
+        if self.on_remove is not None:
+            self.on_remove(value)
+
+
+class ParseCache(LRUCache):
+    """Byte-bounded LRU cache of parsed HConfig trees.
+
+    Entries are keyed by platform and the SHA-256 digest of the config text, so
+    identical configs submitted by different requests share a single parse.
+    """
+
+    def get_hconfig(
+        self,
+        platform: Platform,
+        config_text: str,
+        *,
+        copy: bool = True,
+        namespace: str | None = None,
+    ) -> HConfig:
+        """Return the parsed tree for config_text, parsing it on a cache miss.
+
+        Cached trees are shared between callers, so a deep copy is returned by
+        default. Pass ``copy=False`` only when the tree is never mutated.
+        namespace selects trees stored with put_hconfig under the same namespace.
+        """
+        key = (namespace, platform.name, content_digest(config_text))
+        hconfig: HConfig | None = self.get(key)
+        if hconfig is None:
+            hconfig = get_hconfig(platform, config_text)
+            self.put(key, hconfig, _estimate_size(config_text))
+
+        return hconfig.deep_copy() if copy else hconfig
+
+    def put_hconfig(
+        self, platform: Platform, config_text: str, hconfig: HConfig, *, namespace: str
+    ) -> None:
+        """Cache an already built tree whose text is config_text.
+
+        Used for trees the service builds itself, such as remediation configs, so
+        later calls on their text skip the parse. Such trees may differ from a
+        fresh parse of their text (e.g. in order weights), so they are kept apart
+        from parsed trees and only returned by get_hconfig with the same
+        namespace. The tree must not be mutated.
+        """
+        self.put(
+            (namespace, platform.name, content_digest(config_text)),
+            hconfig,
+            _estimate_size(config_text),
+        )
+
+
+# Global parse cache instance
+parse_cache = ParseCache(max_bytes=settings.parse_cache_max_bytes)
+
+# Global cache of remediation results keyed by platform and input digests
+remediation_cache = LRUCache(
+    max_bytes=settings.remediation_cache_max_bytes,
+    ttl_seconds=settings.remediation_cache_ttl_seconds,
+)
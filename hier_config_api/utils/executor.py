@@ -0,0 +1,154 @@
+"""Executor layer that keeps CPU-bound service calls off the event loop."""
+
+import asyncio
+import functools
+import multiprocessing
+import threading
+import weakref
+from collections.abc import Callable
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from hier_config_api.settings import settings
+
+T = TypeVar("T")
+
+
+class ServiceExecutor:
+    """Run synchronous service calls on a thread or process pool.
+
+    Small inputs run on a thread pool, which shares the in-process caches.
+    Inputs of at least ``process_threshold_bytes`` run on a process pool so
+    large configs use every core instead of contending for the GIL.
+
+    Batch work is limited by its own ``max_batch_concurrency`` instead of
+    ``max_concurrency``, so interactive calls never queue behind a large job.
+    """
+
+    def __init__(
+        self,
+        max_threads: int,
+        max_processes: int,
+        process_threshold_bytes: int,
+        max_concurrency: int,
+        timeout_seconds: float,
+        max_batch_concurrency: int = 1,
+    ) -> None:
+        """Initialize the executor; pools are created on first use."""
+        self.max_threads = max_threads
+        self.max_processes = max_processes
+        self.process_threshold_bytes = process_threshold_bytes
+        self.max_concurrency = max_concurrency
+        self.max_batch_concurrency = max_batch_concurrency
+        self.timeout_seconds = timeout_seconds
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        # asyncio semaphores are bound to a single event loop; one per (loop, batch)
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[bool, asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    async def run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        size_hint: int = 0,
+        timeout: float | None = None,
+        use_process_pool: bool | None = None,
+        batch: bool = False,
+        **kwargs: Any,
+    ) -> T:
+        """Run func(*args, **kwargs) off the event loop and return its result.
+
+        Args:
+            func: A picklable callable (module-level function or static method).
+            size_hint: Approximate input size in bytes, used to choose the pool.
+            timeout: Seconds to wait before raising TimeoutError; defaults to
+                the configured executor timeout.
+            use_process_pool: Force the process (True) or thread (False) pool
+                instead of choosing by size_hint.
+            batch: Count the call against the batch concurrency limit instead
+                of the interactive one.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop, batch)
+        await semaphore.acquire()
+        try:
+            future = loop.run_in_executor(
+                self._select_pool(size_hint, use_process_pool),
+                functools.partial(func, *args, **kwargs),
+            )
+        except BaseException:
+            semaphore.release()
+            raise
+        # Work cannot be interrupted once started, so the slot is only freed when
+        # the call actually finishes, even if the caller has timed out.
+        future.add_done_callback(lambda _: semaphore.release())
+
+        timeout = self.timeout_seconds if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError as e:
+            raise TimeoutError(f"Operation timed out after {timeout:g} seconds") from e
+        except BrokenExecutor:
+            # A worker died (e.g. OOM-killed); start a fresh pool on the next call
+            self._discard_broken_pools()
+            raise
+
+    def shutdown(self) -> None:
+        """Shut down both pools, waiting for running calls to finish."""
+        with self._pool_lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown()
+                self._thread_pool = None
+            if self._process_pool is not None:
+                self._process_pool.shutdown()
+                self._process_pool = None
+
+    def _discard_broken_pools(self) -> None:
+        """Drop the process pool if it can no longer accept work."""
+        with self._pool_lock:
+            if self._process_pool is not None and getattr(self._process_pool, "_broken", False):
+                self._process_pool.shutdown(wait=False)
+                self._process_pool = None
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop, batch: bool) -> asyncio.Semaphore:
+        """Return the interactive or batch concurrency semaphore for the event loop."""
+        semaphores = self._semaphores.setdefault(loop, {})
+        semaphore = semaphores.get(batch)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(
+                self.max_batch_concurrency if batch else self.max_concurrency
+            )
+            semaphores[batch] = semaphore
+        return semaphore
+
+    def _select_pool(self, size_hint: int, use_process_pool: bool | None) -> Executor:
+        """Choose the pool for an input of size_hint bytes, creating it if needed."""
+        if use_process_pool is None:
+            use_process_pool = 0 < self.process_threshold_bytes <= size_hint
+        with self._pool_lock:
+            if use_process_pool:
+                if self._process_pool is None:
+                    self._process_pool = ProcessPoolExecutor(
+                        max_workers=self.max_processes,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                return self._process_pool
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(
+                    max_workers=self.max_threads, thread_name_prefix="hier-config-api"
+                )
+            return self._thread_pool
+
+
+# Global executor instance
+executor = ServiceExecutor(
+    max_threads=settings.executor_max_threads,
+    max_processes=settings.executor_max_processes,
+    process_threshold_bytes=settings.executor_process_threshold_bytes,
+    max_concurrency=settings.executor_max_concurrency,
+    timeout_seconds=settings.executor_timeout_seconds,
+    max_batch_concurrency=settings.executor_max_batch_concurrency,
+)
@@ -1,62 +1,1051 @@
-"""In-memory storage for reports and batch jobs."""
+"""Storage backends for reports, batch jobs, remediations and device baselines."""
 
+import asyncio
+import functools
+import pickle
+import sqlite3
+import threading
+import time
 import uuid
-from typing import Any
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any, NamedTuple, TypeVar
 
+from hier_config_api.settings import settings
+from hier_config_api.utils.cache import LRUCache, approximate_size, content_digest
 
-class InMemoryStorage:
-    """Simple in-memory storage for reports and jobs."""
+T = TypeVar("T")
 
-    def __init__(self) -> None:
-        """Initialize storage."""
-        self._reports: dict[str, dict[str, Any]] = {}
-        self._jobs: dict[str, dict[str, Any]] = {}
-        self._remediations: dict[str, dict[str, Any]] = {}
+# Record fields whose text is moved to the blob store
+_BLOB_FIELDS = frozenset(
+    {
+        "running_config",
+        "intended_config",
+        "remediation_config",
+        "rollback_config",
+        "remediation",
+        "rollback",
+    }
+)
+
+# Shorter texts stay inline; hashing and compressing them does not pay off
+_BLOB_MIN_BYTES = 256
+
+# Job fields that grow with the number of devices
+_JOB_BULK_FIELDS = frozenset({"device_configs", "results"})
+
+# Positions per query; stays below SQLite's limit on bound parameters
+_SQLITE_MAX_PARAMETERS = 500
+
+
+class RecordTooLargeError(ValueError):
+    """Raised when a record alone exceeds the memory budget of its collection."""
+
+
+class Storage(ABC):
+    """Interface implemented by every storage backend.
+
+    Records are plain dicts. Callers must write changes back through the
+    ``update_*`` and ``modify_*`` methods; a backend may return a copy from
+    ``get_*``.
+
+    Large config and remediation texts of jobs, remediations and baselines are
+    kept once per distinct text in a compressed, content-addressed blob store and are
+    decompressed transparently when a record is read.
+    """
+
+    # Whether calls wait on I/O or locks held by other processes; see run_storage
+    blocking_io = True
+
+    @abstractmethod
+    def store_report(self, report_data: dict[str, Any]) -> str:
+        """Store a report and return its ID."""
+
+    @abstractmethod
+    def get_report(self, report_id: str) -> dict[str, Any] | None:
+        """Retrieve a report by ID."""
+
+    @abstractmethod
+    def modify_report(
+        self, report_id: str, modify: Callable[[dict[str, Any]], tuple[T, int]]
+    ) -> T | None:
+        """Atomically apply modify to a report in place and store the result.
+
+        modify returns its result and the approximate change of the report's
+        size in bytes, which bounded backends charge without re-measuring the
+        report. No other update of the report, from this or another process,
+        can run between reading and writing it back. Returns the result of
+        modify, or None if the report does not exist.
+        """
+
+    @abstractmethod
+    def store_job(self, job_data: dict[str, Any]) -> str:
+        """Store a batch job and return its ID."""
+
+    @abstractmethod
+    def get_job(self, job_id: str, include_device_configs: bool = True) -> dict[str, Any] | None:
+        """Retrieve a batch job by ID.
+
+        Pass ``include_device_configs=False`` when the submitted device configs
+        are not needed; they are then returned as an empty list.
+        """
+
+    @abstractmethod
+    def get_job_status(self, job_id: str) -> dict[str, Any] | None:
+        """Retrieve a batch job without its device configs and results.
+
+        Cheap enough to poll: no stored config or remediation text is read.
+        """
+
+    @abstractmethod
+    def get_job_results(
+        self, job_id: str, positions: Sequence[int]
+    ) -> dict[int, dict[str, Any]] | None:
+        """Retrieve the stored results of a batch job at the given device positions.
+
+        Positions without a result yet are left out. Returns None if the job does
+        not exist.
+        """
+
+    @abstractmethod
+    def update_job(self, job_id: str, updates: dict[str, Any]) -> bool:
+        """Update a batch job."""
+
+    @abstractmethod
+    def store_job_results(
+        self, job_id: str, start_index: int, results: list[dict[str, Any]]
+    ) -> bool:
+        """Store device results of a batch job starting at a device position."""
+
+    @abstractmethod
+    def store_remediation(
+        self, remediation_data: dict[str, Any], remediation_id: str | None = None
+    ) -> str:
+        """Store a remediation, under remediation_id if given, and return its ID."""
+
+    @abstractmethod
+    def get_remediation(self, remediation_id: str) -> dict[str, Any] | None:
+        """Retrieve a remediation by ID."""
+
+    @abstractmethod
+    def update_remediation(self, remediation_id: str, updates: dict[str, Any]) -> bool:
+        """Update a remediation."""
+
+    @abstractmethod
+    def touch_remediation(self, remediation_id: str) -> bool:
+        """Keep a remediation from expiring and return whether it exists."""
+
+    @abstractmethod
+    def store_baseline(
+        self, device_id: str, baseline_data: dict[str, Any], expected_digest: str | None = None
+    ) -> bool:
+        """Store the baseline of a device, replacing any previous one.
+
+        With expected_digest, the baseline is only replaced if the stored one's
+        ``running_digest`` still matches, so a delta computed against an outdated
+        baseline is rejected. Returns whether the baseline was stored.
+        """
+
+    @abstractmethod
+    def get_baseline(self, device_id: str) -> dict[str, Any] | None:
+        """Retrieve the baseline of a device.
+
+        Reading a baseline keeps it from expiring, so devices whose configs
+        never change keep their baseline.
+        """
+
+    @abstractmethod
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return entry counts and approximate size per collection."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release resources held by the backend."""
+
+
+class BlobRef(NamedTuple):
+    """Reference to a text kept in a blob store."""
+
+    digest: str
+
+
+class BlobStore:
+    """Content-addressed store of zlib-compressed text.
+
+    Each distinct text is stored once, keyed by its SHA-256 digest, and
+    reference counted so it is dropped when the last record using it goes.
+    Recently read texts are kept decompressed in an LRU cache.
+    """
+
+    def __init__(self, cache_max_bytes: int) -> None:
+        """Initialize the store with the budget of its decompressed-text cache."""
+        # digest -> [compressed text, reference count, text length]
+        self._blobs: dict[str, list[Any]] = {}
+        self._lock = threading.Lock()
+        self._texts = LRUCache(cache_max_bytes)
+
+    def put(self, text: str) -> str:
+        """Add a reference to text, storing it if new, and return its digest."""
+        digest = content_digest(text)
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is not None:
+                blob[1] += 1
+                return digest
+        compressed = zlib.compress(text.encode())
+        with self._lock:
+            blob = self._blobs.setdefault(digest, [compressed, 0, len(text)])
+            blob[1] += 1
+        return digest
+
+    def get(self, digest: str) -> str:
+        """Return the text stored under digest."""
+        text: str | None = self._texts.get(digest)
+        if text is None:
+            with self._lock:
+                compressed = self._blobs[digest][0]
+            text = zlib.decompress(compressed).decode()
+            self._texts.put(digest, text, len(text))
+        return text
+
+    def size(self, digest: str) -> int:
+        """Return the compressed size of the text stored under digest."""
+        with self._lock:
+            blob = self._blobs.get(digest)
+            return 0 if blob is None else len(blob[0])
+
+    def release(self, digest: str) -> None:
+        """Drop a reference to digest, removing the text when none are left."""
+        with self._lock:
+            blob = self._blobs.get(digest)
+            if blob is None:
+                return
+            blob[1] -= 1
+            if blob[1] <= 0:
+                del self._blobs[digest]
+
+    def stats(self) -> dict[str, Any]:
+        """Return the number of texts, references and stored bytes."""
+        with self._lock:
+            blobs = list(self._blobs.values())
+        return {
+            "entries": len(blobs),
+            "references": sum(blob[1] for blob in blobs),
+            "current_bytes": sum(len(blob[0]) for blob in blobs),
+            "text_bytes": sum(blob[2] for blob in blobs),
+        }
+
+
+class InMemoryStorage(Storage):
+    """In-memory storage for reports, jobs, remediations and baselines.
+
+    Each collection is an LRU cache bounded by the approximate memory of its
+    records, including the compressed size of every blob a record references
+    (a shared blob counts toward each record using it). Records expire
+    ``ttl_seconds`` after they were last written, and the least recently used
+    records are evicted when a collection exceeds ``max_bytes``. Updates are
+    serialized with a lock; the data is private to the process, so multiple
+    workers need the sqlite backend.
+    """
+
+    blocking_io = False
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: float | None = None,
+        blob_cache_max_bytes: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize storage with a per-collection memory budget."""
+        self._blobs = BlobStore(blob_cache_max_bytes)
+        # Serializes read-modify-write updates and reads of records being updated
+        self._lock = threading.RLock()
+        self._reports = LRUCache(max_bytes, ttl_seconds, clock=clock)
+        # Compressed blob bytes charged to the records of each collection
+        self._blob_bytes = {"jobs": 0, "remediations": 0, "baselines": 0}
+        self._blob_bytes_lock = threading.Lock()
+        self._jobs = LRUCache(
+            max_bytes,
+            ttl_seconds,
+            on_remove=functools.partial(self._release_blobs, "jobs"),
+            clock=clock,
+        )
+        self._remediations = LRUCache(
+            max_bytes,
+            ttl_seconds,
+            on_remove=functools.partial(self._release_blobs, "remediations"),
+            clock=clock,
+        )
+        self._baselines = LRUCache(
+            max_bytes,
+            ttl_seconds,
+            on_remove=functools.partial(self._release_blobs, "baselines"),
+            clock=clock,
+        )
 
     def store_report(self, report_data: dict[str, Any]) -> str:
         """Store a report and return its ID."""
         report_id = str(uuid.uuid4())
-        self._reports[report_id] = report_data
+        _put_record(self._reports, "report", report_id, report_data, approximate_size(report_data))
         return report_id
 
     def get_report(self, report_id: str) -> dict[str, Any] | None:
-        """Retrieve a report by ID."""
-        return self._reports.get(report_id)
+        """Retrieve a report by ID.
+
+        The returned report is a snapshot that is never modified, so it can be
+        read, or streamed, while the report is being updated.
+        """
+        report_data: dict[str, Any] | None = self._reports.get(report_id)
+        return report_data
+
+    def modify_report(
+        self, report_id: str, modify: Callable[[dict[str, Any]], tuple[T, int]]
+    ) -> T | None:
+        """Atomically apply modify to a copy of a report and swap the copy in."""
+        with self._lock:
+            report_data = self._reports.get(report_id)
+            if report_data is None:
+                return None
+            # Copy on write: readers keep the snapshot they already hold
+            report_data = _loads(_dumps(report_data))
+            result, size_delta = modify(report_data)
+            self._reports.replace(report_id, report_data, size_delta)
+            return result
 
     def store_job(self, job_data: dict[str, Any]) -> str:
         """Store a batch job and return its ID."""
         job_id = str(uuid.uuid4())
-        self._jobs[job_id] = job_data
+        job = _externalize(job_data, self._blobs.put)
+        _put_record(self._jobs, "batch job", job_id, job, self._charge("jobs", job))
         return job_id
 
-    def get_job(self, job_id: str) -> dict[str, Any] | None:
+    def get_job(self, job_id: str, include_device_configs: bool = True) -> dict[str, Any] | None:
         """Retrieve a batch job by ID."""
-        return self._jobs.get(job_id)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if not include_device_configs:
+                job = {**job, "device_configs": []}
+            job_data: dict[str, Any] = _internalize(job, self._blobs.get)
+            return job_data
+
+    def get_job_status(self, job_id: str) -> dict[str, Any] | None:
+        """Retrieve a batch job without its device configs and results."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if key not in _JOB_BULK_FIELDS}
+
+    def get_job_results(
+        self, job_id: str, positions: Sequence[int]
+    ) -> dict[int, dict[str, Any]] | None:
+        """Retrieve the stored results of a batch job at the given device positions."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job_results = job["results"]
+            return {
+                position: _internalize(job_results[position], self._blobs.get)
+                for position in positions
+                if position < len(job_results) and job_results[position] is not None
+            }
 
     def update_job(self, job_id: str, updates: dict[str, Any]) -> bool:
         """Update a batch job."""
-        if job_id in self._jobs:
-            self._jobs[job_id].update(updates)
-            return True
-        return False
+        return self._update_record("jobs", self._jobs, job_id, updates)
+
+    def store_job_results(
+        self, job_id: str, start_index: int, results: list[dict[str, Any]]
+    ) -> bool:
+        """Store device results of a batch job starting at a device position."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            results = _externalize(results, self._blobs.put)
+            job_results = job["results"]
+            end_index = start_index + len(results)
+            if len(job_results) < end_index:
+                job_results.extend([None] * (end_index - len(job_results)))
+            replaced = job_results[start_index:end_index]
+            job_results[start_index:end_index] = results
+            released = self._release_blobs("jobs", replaced)
+            return self._jobs.resize(job_id, self._charge("jobs", results) - released)
 
-    def store_remediation(self, remediation_data: dict[str, Any]) -> str:
-        """Store a remediation and return its ID."""
-        remediation_id = str(uuid.uuid4())
-        self._remediations[remediation_id] = remediation_data
+    def store_remediation(
+        self, remediation_data: dict[str, Any], remediation_id: str | None = None
+    ) -> str:
+        """Store a remediation, under remediation_id if given, and return its ID."""
+        remediation_id = remediation_id or str(uuid.uuid4())
+        remediation = _externalize(remediation_data, self._blobs.put)
+        _put_record(
+            self._remediations,
+            "remediation",
+            remediation_id,
+            remediation,
+            self._charge("remediations", remediation),
+        )
         return remediation_id
 
     def get_remediation(self, remediation_id: str) -> dict[str, Any] | None:
         """Retrieve a remediation by ID."""
-        return self._remediations.get(remediation_id)
+        with self._lock:
+            remediation = self._remediations.get(remediation_id)
+            if remediation is None:
+                return None
+            remediation_data: dict[str, Any] = _internalize(remediation, self._blobs.get)
+            return remediation_data
 
     def update_remediation(self, remediation_id: str, updates: dict[str, Any]) -> bool:
         """Update a remediation."""
-        if remediation_id in self._remediations:
-            self._remediations[remediation_id].update(updates)
+        return self._update_record("remediations", self._remediations, remediation_id, updates)
+
+    def touch_remediation(self, remediation_id: str) -> bool:
+        """Restart the TTL of a remediation and return whether it exists."""
+        return self._remediations.resize(remediation_id, 0)
+
+    def store_baseline(
+        self, device_id: str, baseline_data: dict[str, Any], expected_digest: str | None = None
+    ) -> bool:
+        """Store the baseline of a device, replacing any previous one."""
+        with self._lock:
+            if expected_digest is not None:
+                current = self._baselines.get(device_id)
+                if current is None or current["running_digest"] != expected_digest:
+                    return False
+            baseline = _externalize(baseline_data, self._blobs.put)
+            # Replacing the entry releases the blobs of the previous baseline
+            _put_record(
+                self._baselines,
+                "baseline",
+                device_id,
+                baseline,
+                self._charge("baselines", baseline),
+            )
             return True
-        return False
+
+    def get_baseline(self, device_id: str) -> dict[str, Any] | None:
+        """Retrieve the baseline of a device."""
+        with self._lock:
+            baseline = self._baselines.get(device_id)
+            if baseline is None:
+                return None
+            self._baselines.resize(device_id, 0)
+            baseline_data: dict[str, Any] = _internalize(baseline, self._blobs.get)
+            return baseline_data
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return entry counts, approximate memory and eviction counters per collection."""
+        with self._blob_bytes_lock:
+            blob_bytes = dict(self._blob_bytes)
+        return {
+            "reports": self._reports.stats(),
+            "jobs": {**self._jobs.stats(), "blob_bytes": blob_bytes["jobs"]},
+            "remediations": {
+                **self._remediations.stats(),
+                "blob_bytes": blob_bytes["remediations"],
+            },
+            "baselines": {**self._baselines.stats(), "blob_bytes": blob_bytes["baselines"]},
+            "blobs": self._blobs.stats(),
+        }
+
+    def close(self) -> None:
+        """Nothing to release; stored data lives as long as the process."""
+
+    def _update_record(
+        self, name: str, collection: LRUCache, key: str, updates: dict[str, Any]
+    ) -> bool:
+        """Apply updates to a stored record and account for its change in size."""
+        with self._lock:
+            record = collection.get(key)
+            if record is None:
+                return False
+            updates = _externalize(updates, self._blobs.put)
+            replaced = [record[field] for field in updates if field in record]
+            record.update(updates)
+            released = self._release_blobs(name, replaced)
+            return collection.resize(key, self._charge(name, list(updates.values())) - released)
+
+    def _charge(self, name: str, data: Any) -> int:
+        """Return the size of data, charging its blobs to collection name."""
+        blob_bytes = sum(self._blobs.size(digest) for digest in _blob_digests(data))
+        with self._blob_bytes_lock:
+            self._blob_bytes[name] += blob_bytes
+        return approximate_size(data) + blob_bytes
+
+    def _release_blobs(self, name: str, data: Any) -> int:
+        """Drop the blob references held by data and return the size it was charged."""
+        blob_bytes = 0
+        for digest in _blob_digests(data):
+            blob_bytes += self._blobs.size(digest)
+            self._blobs.release(digest)
+        with self._blob_bytes_lock:
+            self._blob_bytes[name] -= blob_bytes
+        return approximate_size(data) + blob_bytes
+
+
+class SQLiteStorage(Storage):
+    """Persistent storage in a SQLite database file.
+
+    The database runs in WAL mode so readers never block the writer, which lets
+    several worker processes serve the same reports and jobs. Each thread
+    reuses its own connection, records are stored as pickled blobs, and batch
+    job results live in their own table so a finished chunk is written in one
+    batched insert instead of rewriting the whole job.
+
+    Every read-modify-write update runs in a ``BEGIN IMMEDIATE`` transaction,
+    which takes the database write lock before reading, so concurrent updates
+    from any thread or process are applied one after the other.
+
+    With ``ttl_seconds``, records expire that long after they were last
+    written (baselines and remediations also when read through
+    ``get_baseline`` and ``touch_remediation``). Writes purge expired records
+    at most every ``purge_interval_seconds``, together with the blobs no
+    remaining record references, tracked per record in ``blob_refs``.
+    """
+
+    # Tables holding records that expire, with their key column
+    _RECORD_TABLES = (
+        ("reports", "id"),
+        ("jobs", "id"),
+        ("remediations", "id"),
+        ("baselines", "device_id"),
+    )
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS reports (
+            id TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS reports_updated_at ON reports (updated_at);
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at);
+        CREATE TABLE IF NOT EXISTS job_results (
+            job_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            result BLOB NOT NULL,
+            PRIMARY KEY (job_id, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS remediations (
+            id TEXT PRIMARY KEY,
+            data BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS remediations_updated_at ON remediations (updated_at);
+        CREATE TABLE IF NOT EXISTS baselines (
+            device_id TEXT PRIMARY KEY,
+            running_digest TEXT NOT NULL,
+            data BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS baselines_updated_at ON baselines (updated_at);
+        CREATE TABLE IF NOT EXISTS blobs (
+            digest TEXT PRIMARY KEY,
+            data BLOB NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS blob_refs (
+            owner TEXT NOT NULL,
+            digest TEXT NOT NULL,
+            PRIMARY KEY (owner, digest)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS blob_refs_digest ON blob_refs (digest);
+    """
+
+    def __init__(
+        self,
+        path: str,
+        busy_timeout_seconds: float = 30.0,
+        blob_cache_max_bytes: int = 0,
+        ttl_seconds: float | None = None,
+        purge_interval_seconds: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Open (and if needed create) the database at path."""
+        self.path = path
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self._clock = clock
+        self._next_purge = 0.0
+        # Recently read blob texts, decompressed
+        self._blob_texts = LRUCache(blob_cache_max_bytes)
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection().executescript(self._SCHEMA)
+
+    def store_report(self, report_data: dict[str, Any]) -> str:
+        """Store a report and return its ID."""
+        report_id = str(uuid.uuid4())
+        self._purge_if_due()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO reports (id, data, updated_at) VALUES (?, ?, ?)",
+                (report_id, _dumps(report_data), self._clock()),
+            )
+        return report_id
+
+    def get_report(self, report_id: str) -> dict[str, Any] | None:
+        """Retrieve a report by ID."""
+        row = (
+            self._connection()
+            .execute("SELECT data FROM reports WHERE id = ?", (report_id,))
+            .fetchone()
+        )
+        return None if row is None else _loads(row[0])
+
+    def modify_report(
+        self, report_id: str, modify: Callable[[dict[str, Any]], tuple[T, int]]
+    ) -> T | None:
+        """Atomically apply modify to a report in place and store the result."""
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT data FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            report_data = _loads(row[0])
+            result, _ = modify(report_data)
+            connection.execute(
+                "UPDATE reports SET data = ?, updated_at = ? WHERE id = ?",
+                (_dumps(report_data), self._clock(), report_id),
+            )
+        return result
+
+    def store_job(self, job_data: dict[str, Any]) -> str:
+        """Store a batch job and return its ID."""
+        job_id = str(uuid.uuid4())
+        job = dict(job_data)
+        results = job.pop("results", [])
+        self._purge_if_due()
+        with self._transaction() as connection:
+            job = _externalize(job, self._blob_writer(connection, f"jobs:{job_id}"))
+            connection.execute(
+                "INSERT INTO jobs (id, data, updated_at) VALUES (?, ?, ?)",
+                (job_id, _dumps(job), self._clock()),
+            )
+            self._write_job_results(connection, job_id, 0, results)
+        return job_id
+
+    def get_job(self, job_id: str, include_device_configs: bool = True) -> dict[str, Any] | None:
+        """Retrieve a batch job by ID."""
+        connection = self._connection()
+        row = connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = _loads(row[0])
+        if not include_device_configs:
+            job["device_configs"] = []
+        results: list[dict[str, Any] | None] = []
+        for position, result in connection.execute(
+            "SELECT position, result FROM job_results WHERE job_id = ? ORDER BY position",
+            (job_id,),
+        ):
+            results.extend([None] * (position - len(results)))
+            results.append(_loads(result))
+        job["results"] = results
+        job_data: dict[str, Any] = _internalize(job, self._get_blob)
+        return job_data
+
+    def get_job_status(self, job_id: str) -> dict[str, Any] | None:
+        """Retrieve a batch job without its device configs and results."""
+        row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = _loads(row[0])
+        return {key: value for key, value in job.items() if key not in _JOB_BULK_FIELDS}
+
+    def get_job_results(
+        self, job_id: str, positions: Sequence[int]
+    ) -> dict[int, dict[str, Any]] | None:
+        """Retrieve the stored results of a batch job at the given device positions."""
+        connection = self._connection()
+        if connection.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone() is None:
+            return None
+        results = {}
+        positions = list(positions)
+        for start in range(0, len(positions), _SQLITE_MAX_PARAMETERS):
+            batch = positions[start : start + _SQLITE_MAX_PARAMETERS]
+            for position, result in connection.execute(
+                "SELECT position, result FROM job_results "
+                f"WHERE job_id = ? AND position IN ({', '.join('?' * len(batch))})",
+                (job_id, *batch),
+            ):
+                results[position] = _internalize(_loads(result), self._get_blob)
+        return results
+
+    def update_job(self, job_id: str, updates: dict[str, Any]) -> bool:
+        """Update a batch job."""
+        updates = dict(updates)
+        results = updates.pop("results", None)
+        with self._transaction() as connection:
+            row = connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            job_data = _loads(row[0])
+            job_data.update(_externalize(updates, self._blob_writer(connection, f"jobs:{job_id}")))
+            connection.execute(
+                "UPDATE jobs SET data = ?, updated_at = ? WHERE id = ?",
+                (_dumps(job_data), self._clock(), job_id),
+            )
+            if results is not None:
+                connection.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+                self._write_job_results(connection, job_id, 0, results)
+        return True
+
+    def store_job_results(
+        self, job_id: str, start_index: int, results: list[dict[str, Any]]
+    ) -> bool:
+        """Store device results of a batch job starting at a device position."""
+        with self._transaction() as connection:
+            row = connection.execute("SELECT 1 FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return False
+            self._write_job_results(connection, job_id, start_index, results)
+        return True
+
+    def store_remediation(
+        self, remediation_data: dict[str, Any], remediation_id: str | None = None
+    ) -> str:
+        """Store a remediation, under remediation_id if given, and return its ID."""
+        remediation_id = remediation_id or str(uuid.uuid4())
+        owner = f"remediations:{remediation_id}"
+        self._purge_if_due()
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM blob_refs WHERE owner = ?", (owner,))
+            remediation = _externalize(remediation_data, self._blob_writer(connection, owner))
+            connection.execute(
+                "INSERT OR REPLACE INTO remediations (id, data, updated_at) VALUES (?, ?, ?)",
+                (remediation_id, _dumps(remediation), self._clock()),
+            )
+        return remediation_id
+
+    def get_remediation(self, remediation_id: str) -> dict[str, Any] | None:
+        """Retrieve a remediation by ID."""
+        row = (
+            self._connection()
+            .execute("SELECT data FROM remediations WHERE id = ?", (remediation_id,))
+            .fetchone()
+        )
+        if row is None:
+            return None
+        remediation_data: dict[str, Any] = _internalize(_loads(row[0]), self._get_blob)
+        return remediation_data
+
+    def update_remediation(self, remediation_id: str, updates: dict[str, Any]) -> bool:
+        """Update a remediation."""
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT data FROM remediations WHERE id = ?", (remediation_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            remediation_data = _loads(row[0])
+            remediation_data.update(
+                _externalize(
+                    updates, self._blob_writer(connection, f"remediations:{remediation_id}")
+                )
+            )
+            connection.execute(
+                "UPDATE remediations SET data = ?, updated_at = ? WHERE id = ?",
+                (_dumps(remediation_data), self._clock(), remediation_id),
+            )
+        return True
+
+    def touch_remediation(self, remediation_id: str) -> bool:
+        """Restart the TTL of a remediation and return whether it exists."""
+        cursor = self._connection().execute(
+            "UPDATE remediations SET updated_at = ? WHERE id = ?", (self._clock(), remediation_id)
+        )
+        return cursor.rowcount > 0
+
+    def store_baseline(
+        self, device_id: str, baseline_data: dict[str, Any], expected_digest: str | None = None
+    ) -> bool:
+        """Store the baseline of a device, replacing any previous one."""
+        owner = f"baselines:{device_id}"
+        self._purge_if_due()
+        with self._transaction() as connection:
+            if expected_digest is not None:
+                row = connection.execute(
+                    "SELECT running_digest FROM baselines WHERE device_id = ?", (device_id,)
+                ).fetchone()
+                if row is None or row[0] != expected_digest:
+                    return False
+            connection.execute("DELETE FROM blob_refs WHERE owner = ?", (owner,))
+            baseline = _externalize(baseline_data, self._blob_writer(connection, owner))
+            connection.execute(
+                "INSERT OR REPLACE INTO baselines (device_id, running_digest, data, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (device_id, baseline["running_digest"], _dumps(baseline), self._clock()),
+            )
+        return True
+
+    def get_baseline(self, device_id: str) -> dict[str, Any] | None:
+        """Retrieve the baseline of a device and restart its TTL."""
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT data FROM baselines WHERE device_id = ?", (device_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds is not None:
+            connection.execute(
+                "UPDATE baselines SET updated_at = ? WHERE device_id = ?",
+                (self._clock(), device_id),
+            )
+        baseline_data: dict[str, Any] = _internalize(_loads(row[0]), self._get_blob)
+        return baseline_data
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return entry counts and stored bytes per table."""
+        connection = self._connection()
+        stats = {}
+        for table, column in (
+            ("reports", "data"),
+            ("jobs", "data"),
+            ("job_results", "result"),
+            ("remediations", "data"),
+            ("baselines", "data"),
+            ("blobs", "data"),
+        ):
+            entries, current_bytes = connection.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(LENGTH({column})), 0) FROM {table}"
+            ).fetchone()
+            stats[table] = {"entries": entries, "current_bytes": current_bytes}
+        return stats
+
+    def purge_expired(self) -> int:
+        """Delete records older than the TTL and unreferenced blobs.
+
+        Returns the number of records deleted; does nothing without a TTL.
+        """
+        if self.ttl_seconds is None:
+            return 0
+        cutoff = self._clock() - self.ttl_seconds
+        deleted = 0
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM job_results WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            for table, key in self._RECORD_TABLES:
+                connection.execute(
+                    "DELETE FROM blob_refs WHERE owner IN "
+                    f"(SELECT '{table}:' || {key} FROM {table} WHERE updated_at < ?)",
+                    (cutoff,),
+                )
+                deleted += connection.execute(
+                    f"DELETE FROM {table} WHERE updated_at < ?", (cutoff,)
+                ).rowcount
+            connection.execute(
+                "DELETE FROM blobs WHERE digest NOT IN (SELECT digest FROM blob_refs)"
+            )
+        return deleted
+
+    def close(self) -> None:
+        """Close every connection opened by this storage."""
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is None:
+            # Transactions are managed explicitly by _transaction
+            connection = sqlite3.connect(
+                self.path,
+                timeout=self.busy_timeout_seconds,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction that holds the database write lock throughout."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _write_job_results(
+        self,
+        connection: sqlite3.Connection,
+        job_id: str,
+        start_index: int,
+        results: Sequence[dict[str, Any] | None],
+    ) -> None:
+        """Insert or replace job results in a single batched statement."""
+        write_blob = self._blob_writer(connection, f"jobs:{job_id}")
+        connection.executemany(
+            "INSERT OR REPLACE INTO job_results (job_id, position, result) VALUES (?, ?, ?)",
+            [
+                (job_id, start_index + offset, _dumps(_externalize(result, write_blob)))
+                for offset, result in enumerate(results)
+                if result is not None
+            ],
+        )
+
+    def _purge_if_due(self) -> None:
+        """Run purge_expired if purge_interval_seconds passed since the last run."""
+        if self.ttl_seconds is None or self._clock() < self._next_purge:
+            return
+        self._next_purge = self._clock() + self.purge_interval_seconds
+        self.purge_expired()
+
+    @staticmethod
+    def _blob_writer(connection: sqlite3.Connection, owner: str) -> Callable[[str], str]:
+        """Return a function storing a text as a blob of owner within the open transaction.
+
+        owner is ``"<table>:<key>"`` of the record referencing the blob; the
+        reference is dropped when that record expires.
+        """
+
+        def write_blob(text: str) -> str:
+            digest = content_digest(text)
+            connection.execute(
+                "INSERT OR IGNORE INTO blobs (digest, data) VALUES (?, ?)",
+                (digest, zlib.compress(text.encode())),
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO blob_refs (owner, digest) VALUES (?, ?)", (owner, digest)
+            )
+            return digest
+
+        return write_blob
+
+    def _get_blob(self, digest: str) -> str:
+        """Return the text of a blob, decompressing it on a cache miss."""
+        text: str | None = self._blob_texts.get(digest)
+        if text is None:
+            row = (
+                self._connection()
+                .execute("SELECT data FROM blobs WHERE digest = ?", (digest,))
+                .fetchone()
+            )
+            text = zlib.decompress(row[0]).decode()
+            self._blob_texts.put(digest, text, len(text))
+        return text
+
+
+def _put_record(collection: LRUCache, kind: str, key: str, record: Any, size: int) -> None:
+    """Store a record in an in-memory collection, raising if it can never fit."""
+    if not collection.put(key, record, size):
+        raise RecordTooLargeError(
+            f"The {kind} needs about {size} bytes, more than the {collection.max_bytes} bytes "
+            "available to store it"
+        )
+
+
+def _externalize(data: Any, put: Callable[[str], str]) -> Any:
+    """Copy a record, moving large config texts to blobs with put."""
+    if isinstance(data, dict):
+        return {
+            key: BlobRef(put(value))
+            if key in _BLOB_FIELDS and isinstance(value, str) and len(value) >= _BLOB_MIN_BYTES
+            else _externalize(value, put)
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [_externalize(item, put) for item in data]
+    return data
+
+
+def _internalize(data: Any, get: Callable[[str], str]) -> Any:
+    """Copy a record, replacing blob references with their text."""
+    if isinstance(data, BlobRef):
+        return get(data.digest)
+    if isinstance(data, dict):
+        return {key: _internalize(value, get) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_internalize(item, get) for item in data]
+    return data
+
+
+def _blob_digests(data: Any) -> Iterator[str]:
+    """Yield the digest of every blob referenced by a record."""
+    if isinstance(data, BlobRef):
+        yield data.digest
+    elif isinstance(data, dict):
+        for value in data.values():
+            yield from _blob_digests(value)
+    elif isinstance(data, list):
+        for item in data:
+            yield from _blob_digests(item)
+
+
+def _dumps(data: Any) -> bytes:
+    """Serialize a record for SQLite storage."""
+    return pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _loads(blob: bytes) -> Any:
+    """Deserialize a record written by _dumps.
+
+    Only databases written by this service may be opened: unpickling runs code.
+    """
+    return pickle.loads(blob)
+
+
+def create_storage(
+    backend: str,
+    sqlite_path: str,
+    max_bytes: int,
+    ttl_seconds: float | None,
+    blob_cache_max_bytes: int,
+) -> Storage:
+    """Create the storage backend selected in settings."""
+    if backend == "memory":
+        return InMemoryStorage(max_bytes, ttl_seconds, blob_cache_max_bytes)
+    if backend == "sqlite":
+        return SQLiteStorage(
+            sqlite_path, blob_cache_max_bytes=blob_cache_max_bytes, ttl_seconds=ttl_seconds
+        )
+    raise ValueError(f"Unsupported storage backend: {backend}")
 
 
 # Global storage instance
-storage = InMemoryStorage()
+storage = create_storage(
+    settings.storage_backend,
+    settings.storage_sqlite_path,
+    settings.storage_memory_max_bytes,
+    settings.storage_ttl_seconds,
+    settings.storage_blob_cache_max_bytes,
+)
+
+
+async def run_storage(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Call a method of the global storage without blocking the event loop.
+
+    With a backend that blocks on I/O, the call runs on a worker thread: a
+    SQLite write can wait up to its busy timeout for another process's lock.
+    In-memory calls only take short in-process locks and run inline.
+    """
+    if storage.blocking_io:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return func(*args, **kwargs)
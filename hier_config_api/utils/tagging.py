@@ -0,0 +1,274 @@
+"""Compiled tag rule matching and tag filtering of config trees."""
+
+import json
+import re
+from collections.abc import Iterator, Sequence
+from typing import Any, NamedTuple
+
+from hier_config import HConfig, HConfigChild
+
+from hier_config_api.models.remediation import TagRule
+from hier_config_api.settings import settings
+from hier_config_api.utils.bitset import mask_indices, to_mask
+from hier_config_api.utils.cache import LRUCache, content_digest
+
+# Key of the tags stored at a trie node that ends a pattern
+_TAGS = ""
+
+# Rough in-memory cost of one trie node (a dict and its parent's entry)
+_BYTES_PER_TRIE_NODE = 256
+
+# Parentheses or a run of other non-space characters (a tag name or operator)
+_EXPRESSION_TOKEN = re.compile(r"[()]|[^\s()]+")
+
+
+class TagMatcher:
+    """Match lines against a set of tag rules in a single pass.
+
+    A line matches a rule when, ignoring indentation, it starts with any of the
+    rule's match patterns. All patterns are compiled into one character trie, so
+    matching a line walks at most the longest pattern once, however many rules
+    there are.
+    """
+
+    def __init__(self, tag_rules: Sequence[TagRule]) -> None:
+        """Compile the patterns of tag_rules.
+
+        ``size`` is the number of trie nodes, which bounds the matcher's memory.
+        """
+        self._root: dict[str, Any] = {}
+        self._max_length = 0
+        self.size = 1
+        for rule in tag_rules:
+            for pattern in rule.match_rules:
+                node = self._root
+                for char in pattern:
+                    child = node.get(char)
+                    if child is None:
+                        child = node[char] = {}
+                        self.size += 1
+                    node = child
+                tags = node.setdefault(_TAGS, [])
+                tags.extend(tag for tag in rule.tags if tag not in tags)
+                self._max_length = max(self._max_length, len(pattern))
+
+    def match(self, line: str) -> list[str]:
+        """Return the tags of every rule matching line, without duplicates."""
+        node = self._root
+        found: list[str] = list(node.get(_TAGS, ()))
+        for char in line.lstrip()[: self._max_length]:
+            child: dict[str, Any] | None = node.get(char)
+            if child is None:
+                break
+            node = child
+            for tag in node.get(_TAGS, ()):
+                if tag not in found:
+                    found.append(tag)
+        return found
+
+    def tag_tree(self, config: HConfig) -> None:
+        """Add the tags of every matching node to the leaves below it.
+
+        Tagging a section therefore tags all of its children, as hier_config's
+        own tag rules do.
+        """
+        for child in config.all_children():
+            tags = self.match(child.text)
+            if tags:
+                child.tags_add(tags)
+
+
+def get_tag_matcher(tag_rules: list[TagRule]) -> TagMatcher:
+    """Return the compiled matcher for tag_rules, compiling it on a cache miss."""
+    key = content_digest(json.dumps([rule.model_dump() for rule in tag_rules], sort_keys=True))
+    matcher: TagMatcher | None = tag_matcher_cache.get(key)
+    if matcher is None:
+        matcher = TagMatcher(tag_rules)
+        tag_matcher_cache.put(key, matcher, matcher.size * _BYTES_PER_TRIE_NODE)
+    return matcher
+
+
+# Global cache of compiled matchers keyed by the digest of their rule set
+tag_matcher_cache = LRUCache(max_bytes=settings.tag_matcher_cache_max_bytes)
+
+
+def build_tag_index(tags: dict[str, list[str]]) -> dict[str, int]:
+    """Convert per-line tags into a tag to line bitset index.
+
+    Bit i of a tag's bitset is set when line i carries the tag.
+    """
+    lines_by_tag: dict[str, list[int]] = {}
+    for line, line_tags in tags.items():
+        for tag in line_tags:
+            lines_by_tag.setdefault(tag, []).append(int(line))
+    return {tag: to_mask(indices) for tag, indices in lines_by_tag.items()}
+
+
+class TreeLine(NamedTuple):
+    """A line of a rendered config tree."""
+
+    position: int
+    node: HConfigChild
+    is_exit: bool
+
+
+def iter_tree_lines(config: HConfig | HConfigChild) -> Iterator[TreeLine]:
+    """Yield the lines of config in the order and numbering of its text.
+
+    Sectional exit lines (e.g. ``exit``) are included, so positions match the lines
+    of ``str(config)``.
+    """
+    position = 0
+
+    def walk(parent: HConfig | HConfigChild) -> Iterator[TreeLine]:
+        nonlocal position
+        for child in sorted(parent.children):
+            yield TreeLine(position, child, False)
+            position += 1
+            yield from walk(child)
+            if child.sectional_exit:
+                yield TreeLine(position, child, True)
+                position += 1
+
+    yield from walk(config)
+
+
+def render_tree_line(line: TreeLine) -> str:
+    """Return the text of a rendered config tree line."""
+    if line.is_exit:
+        node = line.node
+        return " " * node.driver.rules.indentation * node.depth() + (node.sectional_exit or "")
+    return line.node.cisco_style_text()
+
+
+def index_tree(lines: Sequence[TreeLine]) -> tuple[dict[str, list[str]], dict[str, int]]:
+    """Return the tags of each tagged line and a tag to leaf line bitset index.
+
+    Section lines carry the tags of the leaves below them; only leaves are set
+    in the bitsets, since sections are selected through their children.
+    """
+    tags = {}
+    leaf_tags = {}
+    for line in lines:
+        if line.is_exit:
+            continue
+        line_tags = sorted(line.node.tags)
+        if line_tags:
+            tags[str(line.position)] = line_tags
+            if not line.node.children:
+                leaf_tags[str(line.position)] = line_tags
+    return tags, build_tag_index(leaf_tags)
+
+
+def leaf_mask(lines: Sequence[TreeLine]) -> int:
+    """Return the bitset of leaf lines."""
+    return to_mask(line.position for line in lines if not line.is_exit and not line.node.children)
+
+
+def select_tree_lines(lines: Sequence[TreeLine], mask: int) -> list[TreeLine]:
+    """Return the leaves selected by mask and their sections, in order.
+
+    A section is kept, with its exit line, when any leaf below it is selected.
+    """
+    selected = format(mask, "b")[::-1] if mask else ""
+    kept: set[int] = set()
+    for line in lines:
+        if line.is_exit or line.node.children:
+            continue
+        if line.position >= len(selected) or selected[line.position] != "1":
+            continue
+        node: HConfig | HConfigChild = line.node
+        while isinstance(node, HConfigChild) and id(node) not in kept:
+            kept.add(id(node))
+            node = node.parent
+    return [line for line in lines if id(line.node) in kept]
+
+
+def reindex_selected_lines(
+    selected: Sequence[TreeLine], tag_index: dict[str, int]
+) -> tuple[dict[str, list[str]], dict[str, int]]:
+    """Return the tags and tag index of lines from select_tree_lines, renumbered.
+
+    Lines are numbered by their order in selected, as in the filtered text. The
+    leaf tags come from tag_index, so the tree is not tagged again, and each
+    section carries the tags of its selected leaves only.
+    """
+    leaves = [line for line in selected if not line.is_exit and not line.node.children]
+    selected_leaves = to_mask(line.position for line in leaves)
+    leaf_tags: dict[int, list[str]] = {}
+    for tag, mask in tag_index.items():
+        for position in mask_indices(mask & selected_leaves):
+            leaf_tags.setdefault(position, []).append(tag)
+
+    node_tags: dict[int, set[str]] = {}
+    for line in leaves:
+        if line.position not in leaf_tags:
+            continue
+        node: HConfig | HConfigChild = line.node
+        while isinstance(node, HConfigChild):
+            node_tags.setdefault(id(node), set()).update(leaf_tags[line.position])
+            node = node.parent
+
+    tags = {}
+    new_leaf_tags = {}
+    for position, line in enumerate(selected):
+        line_tags = sorted(node_tags.get(id(line.node), ()))
+        if line.is_exit or not line_tags:
+            continue
+        tags[str(position)] = line_tags
+        if not line.node.children:
+            new_leaf_tags[str(position)] = line_tags
+    return tags, build_tag_index(new_leaf_tags)
+
+
+def evaluate_tag_expression(expression: str, tag_index: dict[str, int], all_lines: int) -> int:
+    """Evaluate a boolean tag expression into a bitset of matching lines.
+
+    Expressions combine tag names with ``and``, ``or``, ``not`` and parentheses,
+    e.g. ``(bgp or ospf) and not risky``; ``not`` binds tightest, then ``and``.
+    Raises ValueError for a malformed expression.
+    """
+    tokens: list[str] = _EXPRESSION_TOKEN.findall(expression)
+    position = 0
+
+    def peek() -> str | None:
+        return tokens[position].lower() if position < len(tokens) else None
+
+    def take() -> str:
+        nonlocal position
+        if position >= len(tokens):
+            raise ValueError(f"Unexpected end of tag expression: {expression!r}")
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or() -> int:
+        mask = parse_and()
+        while peek() == "or":
+            take()
+            mask |= parse_and()
+        return mask
+
+    def parse_and() -> int:
+        mask = parse_not()
+        while peek() == "and":
+            take()
+            mask &= parse_not()
+        return mask
+
+    def parse_not() -> int:
+        token = take()
+        if token.lower() == "not":
+            return all_lines & ~parse_not()
+        if token == "(":
+            mask = parse_or()
+            if take() != ")":
+                raise ValueError(f"Expected ')' in tag expression: {expression!r}")
+            return mask
+        if token == ")" or token.lower() in ("and", "or"):
+            raise ValueError(f"Unexpected {token!r} in tag expression: {expression!r}")
+        return tag_index.get(token, 0)
+
+    mask = parse_or()
+    if position != len(tokens):
+        raise ValueError(f"Unexpected {tokens[position]!r} in tag expression: {expression!r}")
+    return mask
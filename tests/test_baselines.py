@@ -0,0 +1,136 @@
+"""Tests for device baseline endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from hier_config_api.routers import baselines
+from hier_config_api.utils.cache import content_digest
+from hier_config_api.utils.storage import InMemoryStorage
+
+
+def test_baseline_delta(
+    client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test that deltas remediate only when the running config changes."""
+    response = client.put(
+        "/api/v1/baselines/router1",
+        json={
+            "platform": "cisco_ios",
+            "running_config": sample_cisco_ios_config,
+            "intended_config": sample_cisco_ios_intended_config,
+        },
+    )
+    assert response.status_code == 200
+    registered = response.json()
+    assert registered["changed"] is True
+    assert registered["running_digest"] == content_digest(sample_cisco_ios_config)
+    assert "hostname router1-updated" in registered["remediation_config"]
+
+    # Unchanged: the stored remediation is returned
+    response = client.post(
+        "/api/v1/baselines/router1/delta", json={"base_digest": registered["running_digest"]}
+    )
+    assert response.status_code == 200
+    assert response.json()["changed"] is False
+    assert response.json()["remediation_id"] == registered["remediation_id"]
+
+    # Replace "hostname router1" (line 0) with the intended hostname
+    response = client.post(
+        "/api/v1/baselines/router1/delta",
+        json={
+            "base_digest": registered["running_digest"],
+            "patch": [{"start": 0, "delete": 1, "insert": ["hostname router1-updated"]}],
+        },
+    )
+    assert response.status_code == 200
+    patched = response.json()
+    assert patched["changed"] is True
+    assert patched["running_digest"] == content_digest(
+        sample_cisco_ios_config.replace("hostname router1", "hostname router1-updated")
+    )
+    assert "hostname" not in patched["remediation_config"]
+    assert patched["remediation_id"] != registered["remediation_id"]
+    remediation = client.get(f"/api/v1/remediation/{patched['remediation_id']}/filter")
+    assert remediation.json()["filtered_config"] == patched["remediation_config"]
+
+    # The old digest no longer matches the baseline
+    response = client.post(
+        "/api/v1/baselines/router1/delta", json={"base_digest": registered["running_digest"]}
+    )
+    assert response.status_code == 409
+
+
+def test_baseline_delta_errors(client: TestClient, sample_cisco_ios_config: str) -> None:
+    """Test unknown devices, invalid patches and intended config changes."""
+    response = client.post("/api/v1/baselines/missing/delta", json={"base_digest": "0"})
+    assert response.status_code == 404
+    assert client.get("/api/v1/baselines/missing").status_code == 404
+
+    registered = client.put(
+        "/api/v1/baselines/router2",
+        json={
+            "platform": "cisco_ios",
+            "running_config": sample_cisco_ios_config,
+            "intended_config": sample_cisco_ios_config,
+        },
+    ).json()
+    assert registered["remediation_config"] == ""
+
+    response = client.post(
+        "/api/v1/baselines/router2/delta",
+        json={
+            "base_digest": registered["running_digest"],
+            "patch": [{"start": 1000, "delete": 1}],
+        },
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/baselines/router2/delta",
+        json={
+            "base_digest": registered["running_digest"],
+            "intended_config": sample_cisco_ios_config.replace("router1", "router2"),
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["changed"] is True
+    assert response.json()["running_digest"] == registered["running_digest"]
+    remediation_config = response.json()["remediation_config"]
+    assert "hostname router2" in remediation_config
+    assert (
+        client.get("/api/v1/baselines/router2").json()["remediation_config"] == remediation_config
+    )
+
+
+def test_baseline_reads_keep_baseline_and_remediation(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, sample_cisco_ios_config: str
+) -> None:
+    """Test that polled baselines do not expire and keep their remediation ID valid."""
+    now = [0.0]
+    storage = InMemoryStorage(max_bytes=10_000_000, ttl_seconds=60, clock=lambda: now[0])
+    monkeypatch.setattr(baselines, "storage", storage)
+    registered = client.put(
+        "/api/v1/baselines/router3",
+        json={
+            "platform": "cisco_ios",
+            "running_config": sample_cisco_ios_config,
+            "intended_config": sample_cisco_ios_config.replace("router1", "router3"),
+        },
+    ).json()
+
+    # Unchanged deltas never write, but keep the baseline and its remediation alive
+    for _ in range(3):
+        now[0] += 40
+        response = client.post(
+            "/api/v1/baselines/router3/delta", json={"base_digest": registered["running_digest"]}
+        )
+        assert response.status_code == 200
+    assert storage.get_remediation(registered["remediation_id"]) is not None
+
+    # An evicted remediation is restored under the same ID
+    storage._remediations.clear()
+    response = client.get("/api/v1/baselines/router3")
+    assert response.json()["remediation_id"] == registered["remediation_id"]
+    remediation = storage.get_remediation(registered["remediation_id"])
+    assert remediation is not None
+    assert remediation["remediation_config"] == registered["remediation_config"]
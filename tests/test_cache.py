@@ -0,0 +1,79 @@
+"""Tests for the shared caches."""
+
+from hier_config import Platform
+
+from hier_config_api.services.config_service import ConfigService
+from hier_config_api.services.remediation_service import RemediationService
+from hier_config_api.utils.cache import LRUCache, ParseCache, parse_cache
+
+
+def test_parse_cache_hit_and_miss(sample_cisco_ios_config: str) -> None:
+    """Test that identical config text is parsed only once."""
+    cache = ParseCache(max_bytes=10 * 1024 * 1024)
+
+    first = cache.get_hconfig(Platform.CISCO_IOS, sample_cisco_ios_config, copy=False)
+    second = cache.get_hconfig(Platform.CISCO_IOS, sample_cisco_ios_config, copy=False)
+
+    assert first is second
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_parse_cache_copy_on_read(sample_cisco_ios_config: str) -> None:
+    """Test that mutating a returned copy does not affect the cached tree."""
+    cache = ParseCache(max_bytes=10 * 1024 * 1024)
+
+    copy = cache.get_hconfig(Platform.CISCO_IOS, sample_cisco_ios_config)
+    copy.add_child("snmp-server community private RO")
+
+    shared = cache.get_hconfig(Platform.CISCO_IOS, sample_cisco_ios_config, copy=False)
+    assert shared is not copy
+    assert "snmp-server community private RO" not in str(shared)
+
+
+def test_parse_cache_lru_eviction() -> None:
+    """Test that least recently used entries are evicted over the byte budget."""
+    cache = ParseCache(max_bytes=3000)
+
+    cache.get_hconfig(Platform.CISCO_IOS, "hostname a")
+    cache.get_hconfig(Platform.CISCO_IOS, "hostname b")
+    cache.get_hconfig(Platform.CISCO_IOS, "hostname a")
+    cache.get_hconfig(Platform.CISCO_IOS, "hostname c")
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["current_bytes"] <= 3000
+    # "hostname b" was the least recently used entry
+    cache.get_hconfig(Platform.CISCO_IOS, "hostname a")
+    assert cache.stats()["hits"] == 2
+
+
+def test_lru_cache_ttl_expiry() -> None:
+    """Test that entries older than the TTL are treated as misses."""
+    now = [0.0]
+    cache = LRUCache(max_bytes=1024, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("key", "value", 5)
+    now[0] = 10
+    assert cache.get("key") == "value"
+
+    now[0] = 10.5
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_remediation_trees_do_not_leak_into_parses() -> None:
+    """Test that workflow-built trees seeded for tagging do not change other results."""
+    running = "interface G1\n shutdown"
+    intended = "interface G1\n description up\n no shutdown"
+    fragment = "interface G1\n mtu 9000"
+
+    parse_cache.clear()
+    remediation = RemediationService.generate_remediation("cisco_ios", running, intended)
+    remediation_text = remediation["remediation_config"]
+    warm = ConfigService.merge_configs("cisco_ios", [remediation_text, fragment])
+
+    parse_cache.clear()
+    cold = ConfigService.merge_configs("cisco_ios", [remediation_text, fragment])
+    assert warm == cold
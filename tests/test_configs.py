@@ -78,3 +78,132 @@ def test_search_config(client: TestClient, sample_cisco_ios_config: str) -> None
     assert data["platform"] == "cisco_ios"
     assert "matches" in data
     assert "match_count" in data
+
+
+def test_parse_config_flat(client: TestClient, sample_cisco_ios_config: str) -> None:
+    """Test parsing configuration into flat text/depth/parent arrays."""
+    response = client.post(
+        "/api/v1/configs/parse",
+        json={
+            "platform": "cisco_ios",
+            "config_text": sample_cisco_ios_config,
+            "output_format": "flat",
+        },
+    )
+    assert response.status_code == 200
+    flat = response.json()["structured_config"]
+    assert flat["text"][:4] == [
+        "hostname router1",
+        "interface GigabitEthernet0/0",
+        "ip address 192.168.1.1 255.255.255.0",
+        "no shutdown",
+    ]
+    assert flat["depth"][:4] == [0, 0, 1, 1]
+    assert flat["parent"][:4] == [-1, -1, 1, 1]
+    assert len(flat["text"]) == len(flat["depth"]) == len(flat["parent"])
+
+
+def test_parse_config_invalid_output_format(
+    client: TestClient, sample_cisco_ios_config: str
+) -> None:
+    """Test that an unknown output format is rejected."""
+    response = client.post(
+        "/api/v1/configs/parse",
+        json={
+            "platform": "cisco_ios",
+            "config_text": sample_cisco_ios_config,
+            "output_format": "xml",
+        },
+    )
+    assert response.status_code == 400
+
+
+def test_parse_config_path_and_max_depth(client: TestClient, sample_cisco_ios_config: str) -> None:
+    """Test serializing only selected sections up to a maximum depth."""
+    response = client.post(
+        "/api/v1/configs/parse",
+        json={
+            "platform": "cisco_ios",
+            "config_text": sample_cisco_ios_config,
+            "output_format": "flat",
+            "path": ["interface"],
+            "max_depth": 0,
+        },
+    )
+    assert response.status_code == 200
+    flat = response.json()["structured_config"]
+    assert flat["text"] == ["interface GigabitEthernet0/0", "interface GigabitEthernet0/1"]
+
+    response = client.post(
+        "/api/v1/configs/parse",
+        json={
+            "platform": "cisco_ios",
+            "config_text": sample_cisco_ios_config,
+            "path": ["router bgp"],
+        },
+    )
+    tree = response.json()["structured_config"]
+    assert len(tree["children"]) == 1
+    assert tree["children"][0]["text"] == "router bgp 65001"
+    assert tree["children"][0]["children"][0]["children"] == []
+
+    # Lines below max_depth are neither walked nor rendered into any text
+    response = client.post(
+        "/api/v1/configs/parse",
+        json={
+            "platform": "cisco_ios",
+            "config_text": sample_cisco_ios_config,
+            "path": ["router bgp"],
+            "max_depth": 0,
+        },
+    )
+    tree = response.json()["structured_config"]
+    assert tree["children"] == [{"text": "router bgp 65001", "children": []}]
+    assert tree["text"] == "router bgp 65001"
+    assert "neighbor" not in response.text
+
+
+def test_merge_configs_combines_sections(client: TestClient) -> None:
+    """Test that overlapping sections are merged and idempotent commands replaced."""
+    response = client.post(
+        "/api/v1/configs/merge",
+        json={
+            "platform": "cisco_ios",
+            "configs": [
+                "interface GigabitEthernet0/1\n description old\n no shutdown",
+                "interface GigabitEthernet0/1\n description new\n mtu 9000",
+                "interface GigabitEthernet0/2\n shutdown",
+            ],
+        },
+    )
+    assert response.status_code == 200
+    merged = response.json()["merged_config"]
+    assert merged.count("interface GigabitEthernet0/1") == 1
+    assert "description new" in merged
+    assert "description old" not in merged
+    assert "no shutdown" in merged
+    assert "mtu 9000" in merged
+    assert "interface GigabitEthernet0/2" in merged
+
+
+def test_predict_config_candidates(client: TestClient, sample_cisco_ios_config: str) -> None:
+    """Test predicting several candidate command sets against one current config."""
+    response = client.post(
+        "/api/v1/configs/predict",
+        json={
+            "platform": "cisco_ios",
+            "current_config": sample_cisco_ios_config,
+            "commands_to_apply": "hostname router2",
+            "candidate_commands": [
+                "interface GigabitEthernet0/1\n description uplink",
+                "interface GigabitEthernet0/0\n description old\n no shutdown",
+            ],
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert "hostname router2" in data["predicted_config"]
+    assert len(data["candidate_predictions"]) == 2
+    assert "description uplink" in data["candidate_predictions"][0]
+    assert "description uplink" not in data["candidate_predictions"][1]
+    assert "hostname router1" in data["candidate_predictions"][1]
@@ -0,0 +1,80 @@
+"""Tests for the service executor."""
+
+import asyncio
+import time
+
+import pytest
+
+from hier_config_api.services.config_service import ConfigService
+from hier_config_api.services.platform_service import PlatformService
+from hier_config_api.utils.executor import ServiceExecutor
+
+
+def _make_executor(**overrides: float) -> ServiceExecutor:
+    """Build a small executor for tests."""
+    options = {
+        "max_threads": 2,
+        "max_processes": 1,
+        "process_threshold_bytes": 0,
+        "max_concurrency": 2,
+        "timeout_seconds": 5.0,
+    }
+    options.update(overrides)
+    return ServiceExecutor(**options)  # type: ignore[arg-type]
+
+
+async def test_executor_runs_service_call(sample_cisco_ios_config: str) -> None:
+    """Test running a service call on the thread pool."""
+    executor = _make_executor()
+    try:
+        result = await executor.run(
+            PlatformService.validate_config, "cisco_ios", sample_cisco_ios_config
+        )
+    finally:
+        executor.shutdown()
+    assert result["is_valid"] is True
+
+
+async def test_executor_uses_process_pool_for_large_inputs(sample_cisco_ios_config: str) -> None:
+    """Test that inputs over the threshold run in a worker process."""
+    executor = _make_executor(process_threshold_bytes=1)
+    try:
+        result = await executor.run(
+            ConfigService.compare_configs,
+            "cisco_ios",
+            sample_cisco_ios_config,
+            "hostname router2",
+            size_hint=len(sample_cisco_ios_config),
+        )
+    finally:
+        executor.shutdown()
+    assert result[1] is True
+
+
+async def test_executor_timeout() -> None:
+    """Test that slow calls raise TimeoutError."""
+    executor = _make_executor(timeout_seconds=0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            await executor.run(time.sleep, 0.5)
+    finally:
+        executor.shutdown()
+
+
+async def test_executor_batch_calls_do_not_block_interactive_calls() -> None:
+    """Test that batch calls queue on their own limit, not the interactive one."""
+    executor = _make_executor(max_threads=4, max_concurrency=1, max_batch_concurrency=1)
+    try:
+        batch = [
+            asyncio.ensure_future(executor.run(time.sleep, 0.2, use_process_pool=False, batch=True))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await executor.run(time.sleep, 0, use_process_pool=False)
+        elapsed = time.perf_counter() - started
+        assert not any(task.done() for task in batch)
+        await asyncio.gather(*batch)
+    finally:
+        executor.shutdown()
+    assert elapsed < 0.15
@@ -1,7 +1,16 @@
 """Tests for platform and batch endpoints."""
 
+import json
+from collections.abc import Callable
+from typing import Any
+
+import pytest
 from fastapi.testclient import TestClient
 
+from hier_config_api.services import platform_service
+from hier_config_api.services.platform_service import PlatformService
+from hier_config_api.utils.storage import storage
+
 
 def test_list_platforms(client: TestClient) -> None:
     """Test listing all platforms."""
@@ -136,3 +145,162 @@ def test_get_batch_job_results(
     assert "status" in data
     assert "results" in data
     assert "summary" in data
+
+
+def test_batch_job_runs_in_background(
+    client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test that a queued batch job records per-device progress and isolates failures."""
+    create_response = client.post(
+        "/api/v1/batch/remediation",
+        json={
+            "device_configs": [
+                {
+                    "device_id": "router1",
+                    "platform": "cisco_ios",
+                    "running_config": sample_cisco_ios_config,
+                    "intended_config": sample_cisco_ios_intended_config,
+                },
+                {
+                    "device_id": "broken",
+                    "platform": "cisco_ios",
+                    "running_config": None,
+                    "intended_config": sample_cisco_ios_intended_config,
+                },
+            ]
+        },
+    )
+    assert create_response.status_code == 200
+    job_id = create_response.json()["job_id"]
+
+    # The test client waits for background tasks before returning
+    status = client.get(f"/api/v1/batch/jobs/{job_id}").json()
+    assert status["status"] == "completed"
+    assert status["progress"] == 100.0
+    assert status["completed_devices"] == 1
+    assert status["failed_devices"] == 1
+
+    results = client.get(f"/api/v1/batch/jobs/{job_id}/results").json()["results"]
+    assert [r["status"] for r in results] == ["success", "failed"]
+
+
+def test_chunk_device_configs_adapts_to_config_size() -> None:
+    """Test that small configs are grouped and large configs get their own chunk."""
+    small = {"running_config": "hostname a", "intended_config": "hostname b"}
+    large = {"running_config": "x" * 10_000_000, "intended_config": ""}
+    devices = [small, small, large, small]
+
+    chunks = PlatformService.chunk_device_configs(devices, workers=1)
+
+    assert [start for start, _ in chunks] == [0, 2, 3]
+    assert sum(len(chunk) for _, chunk in chunks) == len(devices)
+
+
+def test_batch_job_results_keep_device_order(client: TestClient) -> None:
+    """Test that results of a chunked batch job are returned in submission order."""
+    device_ids = [f"switch{i}" for i in range(20)]
+    create_response = client.post(
+        "/api/v1/batch/remediation",
+        json={
+            "device_configs": [
+                {
+                    "device_id": device_id,
+                    "platform": "cisco_ios",
+                    "running_config": f"hostname {device_id}",
+                    "intended_config": f"hostname {device_id}-new",
+                }
+                for device_id in device_ids
+            ]
+        },
+    )
+    job_id = create_response.json()["job_id"]
+
+    results = client.get(f"/api/v1/batch/jobs/{job_id}/results").json()["results"]
+    assert [r["device_id"] for r in results] == device_ids
+
+
+def test_stream_batch_job_results(
+    client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test streaming batch job results as NDJSON with status filtering."""
+    create_response = client.post(
+        "/api/v1/batch/remediation",
+        json={
+            "device_configs": [
+                {
+                    "device_id": "router1",
+                    "platform": "cisco_ios",
+                    "running_config": sample_cisco_ios_config,
+                    "intended_config": sample_cisco_ios_intended_config,
+                },
+                {"device_id": "broken", "platform": "cisco_ios", "running_config": None},
+            ]
+        },
+    )
+    job_id = create_response.json()["job_id"]
+
+    response = client.get(f"/api/v1/batch/jobs/{job_id}/results/stream")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["device_id"] for line in lines] == ["router1", "broken"]
+
+    response = client.get(
+        f"/api/v1/batch/jobs/{job_id}/results/stream", params={"status": "failed"}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]["index"] == 1
+    assert "error" in lines[0]
+
+
+async def test_stream_job_results_while_running() -> None:
+    """Test that finished devices are streamed before the job completes."""
+    job_data = PlatformService.create_batch_job([{"device_id": "a"}, {"device_id": "b"}])
+    job_id = storage.store_job(job_data)
+    storage.update_job(job_id, {"status": "running"})
+    storage.store_job_results(job_id, 1, [{"device_id": "b", "status": "success"}])
+
+    stream = PlatformService.stream_job_results(job_id)
+    first = json.loads(await anext(stream))
+    assert first["device_id"] == "b"
+
+    storage.store_job_results(job_id, 0, [{"device_id": "a", "status": "success"}])
+    storage.update_job(job_id, {"status": "completed"})
+    remaining = [json.loads(line) async for line in stream]
+    assert [line["device_id"] for line in remaining] == ["a"]
+
+
+async def test_batch_chunk_failure_retries_devices_individually(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a chunk-level failure only fails the device that caused it."""
+
+    class FakeExecutor:
+        max_processes = 1
+        timeout_seconds = 1.0
+
+        async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+            # The chunk times out as a whole and the hung device times out alone
+            if func is PlatformService.process_device_chunk or args[0]["device_id"] == "hung":
+                raise TimeoutError("Operation timed out after 1 seconds")
+            return func(*args)
+
+    monkeypatch.setattr(platform_service, "executor", FakeExecutor())
+    monkeypatch.setattr(
+        PlatformService,
+        "chunk_device_configs",
+        staticmethod(lambda device_configs, workers: [(0, device_configs)]),
+    )
+    devices = [
+        {"device_id": device_id, "running_config": "hostname a", "intended_config": "hostname b"}
+        for device_id in ("r1", "hung", "r2")
+    ]
+    job_id = storage.store_job(PlatformService.create_batch_job(devices))
+    await PlatformService.run_batch_job(job_id)
+
+    job = storage.get_job(job_id)
+    assert job is not None
+    assert job["status"] == "completed"
+    assert [result["status"] for result in job["results"]] == ["success", "failed", "success"]
+    assert job["failed_devices"] == 1
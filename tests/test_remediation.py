@@ -2,6 +2,10 @@
 
 from fastapi.testclient import TestClient
 
+from hier_config_api.models.remediation import TagRule
+from hier_config_api.services.remediation_service import RemediationService
+from hier_config_api.utils.tagging import TagMatcher, get_tag_matcher
+
 
 def test_generate_remediation(
     client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
@@ -42,7 +46,35 @@ def test_generate_remediation_with_tags(
     assert response.status_code == 200
     data = response.json()
     assert "remediation_id" in data
-    assert "remediation_config" in data
+    assert data["remediation_config"].splitlines() == [
+        "interface GigabitEthernet0/1",
+        "  description WAN Link",
+        "  exit",
+    ]
+    assert data["tags"] == {"0": ["safe"], "1": ["safe"]}
+
+
+def test_generate_remediation_filter_reuses_tags() -> None:
+    """Test that filtered remediation tags match tagging the filtered config."""
+    rules = [
+        TagRule(match_rules=["interface", "hostname"], tags=["network"]),
+        TagRule(match_rules=["description"], tags=["cosmetic"]),
+        TagRule(match_rules=["ip address"], tags=["addressing"]),
+    ]
+    intended = (
+        "hostname r2\ninterface Gi0/1\n description WAN\n ip address 10.0.0.1 255.0.0.0\n"
+        "interface Gi0/2\n description LAN"
+    )
+    result = RemediationService.generate_remediation(
+        "cisco_ios", "hostname r1", intended, rules, exclude_tags=["cosmetic"]
+    )
+
+    assert "description" not in result["remediation_config"]
+    tags, tag_index = RemediationService.tag_remediation(
+        "cisco_ios", result["remediation_config"], result["rollback_config"], rules
+    )
+    assert result["tags"] == tags
+    assert result["tag_index"] == tag_index
 
 
 def test_apply_tags(
@@ -72,6 +104,29 @@ def test_apply_tags(
     assert "tags" in data
 
 
+def test_tag_remediation_tree() -> None:
+    """Test that overlapping prefix rules are merged and sections tag their children."""
+    rules = [
+        TagRule(match_rules=["interface", "router bgp"], tags=["network"]),
+        TagRule(match_rules=["interface Gig"], tags=["access"]),
+        TagRule(match_rules=["ip address"], tags=["addressing"]),
+    ]
+    text = "interface GigabitEthernet0/0\n ip address 10.0.0.1 255.0.0.0\nhostname r1\nrouter bgp 1"
+
+    tags, tag_index = RemediationService.tag_remediation("cisco_ios", text, "", rules)
+
+    # Lines: 0 interface, 1 ip address, 2 exit, 3 hostname, 4 router bgp
+    assert tags == {
+        "0": ["access", "addressing", "network"],
+        "1": ["access", "addressing", "network"],
+        "4": ["network"],
+    }
+    assert tag_index["remediation"]["network"] == 0b10010
+    assert get_tag_matcher([rule.model_copy() for rule in rules]) is get_tag_matcher(rules)
+    # One node per distinct pattern prefix, plus the root
+    assert TagMatcher(rules).size == 33
+
+
 def test_filter_remediation(
     client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
 ) -> None:
@@ -97,3 +152,89 @@ def test_filter_remediation(
     assert data["remediation_id"] == remediation_id
     assert "filtered_config" in data
     assert "summary" in data
+
+
+def test_filter_remediation_tag_expression(
+    client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test filtering remediation and rollback with a boolean tag expression."""
+    gen_response = client.post(
+        "/api/v1/remediation/generate",
+        json={
+            "platform": "cisco_ios",
+            "running_config": sample_cisco_ios_config,
+            "intended_config": sample_cisco_ios_intended_config,
+        },
+    )
+    remediation_id = gen_response.json()["remediation_id"]
+    client.post(
+        f"/api/v1/remediation/{remediation_id}/tags",
+        json={
+            "tag_rules": [
+                {"match_rules": ["hostname", "no hostname"], "tags": ["system"]},
+                {"match_rules": ["router bgp", "neighbor", "no neighbor"], "tags": ["routing"]},
+                {"match_rules": ["neighbor", "no neighbor"], "tags": ["peer"]},
+            ]
+        },
+    )
+
+    response = client.get(
+        f"/api/v1/remediation/{remediation_id}/filter",
+        params={"tag_expression": "(system or routing) and not peer"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["filtered_config"].splitlines() == [
+        "no hostname router1",
+        "hostname router1-updated",
+    ]
+    assert data["filtered_rollback"].splitlines() == [
+        "no hostname router1-updated",
+        "hostname router1",
+    ]
+    assert data["summary"]["additions"] == 2
+
+    response = client.get(
+        f"/api/v1/remediation/{remediation_id}/filter",
+        params={"exclude_tags": ["routing"], "tag_expression": "not system"},
+    )
+    assert response.status_code == 200
+    assert response.json()["filtered_config"].splitlines() == [
+        "interface GigabitEthernet0/1",
+        "  description WAN Link",
+        "  exit",
+    ]
+
+    response = client.get(
+        f"/api/v1/remediation/{remediation_id}/filter", params={"include_tags": ["peer"]}
+    )
+    assert response.json()["filtered_rollback"].splitlines() == [
+        "router bgp 65001",
+        "  no neighbor 192.168.1.3 remote-as 65003",
+        "  exit",
+    ]
+
+    response = client.get(
+        f"/api/v1/remediation/{remediation_id}/filter", params={"tag_expression": "(system"}
+    )
+    assert response.status_code == 400
+
+
+def test_generate_remediation_cache_header(
+    client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test that repeated remediation requests are served from the cache."""
+    payload = {
+        "platform": "cisco_ios",
+        "running_config": sample_cisco_ios_config + "\n! cache header test",
+        "intended_config": sample_cisco_ios_intended_config,
+    }
+    first = client.post("/api/v1/remediation/generate", json=payload)
+    second = client.post("/api/v1/remediation/generate", json=payload)
+
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert first.headers["X-Remediation-Cache"] == "MISS"
+    assert second.headers["X-Remediation-Cache"] == "HIT"
+    assert first.json()["remediation_config"] == second.json()["remediation_config"]
+    assert first.json()["remediation_id"] != second.json()["remediation_id"]
@@ -1,7 +1,15 @@
 """Tests for multi-device reporting endpoints."""
 
+import csv
+import io
+
+import yaml
 from fastapi.testclient import TestClient
 
+from hier_config_api.models.report import DeviceRemediation
+from hier_config_api.services.remediation_service import RemediationService
+from hier_config_api.services.report_service import ReportService
+
 
 def test_create_report(
     client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
@@ -30,6 +38,8 @@ def test_create_report(
     data = response.json()
     assert "report_id" in data
     assert data["total_devices"] == 2
+    # Both devices share identical configs, so only one remediation is computed
+    assert data["computations_saved"] == 1
 
 
 def test_get_report_summary(
@@ -144,3 +154,271 @@ def test_export_report_csv(
     response = client.get(f"/api/v1/reports/{report_id}/export?format=csv")
     assert response.status_code == 200
     assert "Device ID" in response.text
+
+
+def test_export_report_streams_yaml_and_gzip(
+    client: TestClient, sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test that streamed exports match a full dump and can be gzip-compressed."""
+    create_response = client.post(
+        "/api/v1/reports",
+        json={
+            "remediations": [
+                {
+                    "device_id": f"router{i}",
+                    "platform": "cisco_ios",
+                    "running_config": sample_cisco_ios_config,
+                    "intended_config": sample_cisco_ios_intended_config,
+                }
+                for i in range(3)
+            ]
+        },
+    )
+    report_id = create_response.json()["report_id"]
+
+    json_export = client.get(f"/api/v1/reports/{report_id}/export?format=json").json()
+    yaml_export = client.get(f"/api/v1/reports/{report_id}/export?format=yaml")
+    assert yaml_export.status_code == 200
+    assert yaml.safe_load(yaml_export.text) == json_export
+    assert len(json_export["devices"]) == 3
+
+    gzip_export = client.get(f"/api/v1/reports/{report_id}/export?format=csv&gzip=true")
+    assert gzip_export.status_code == 200
+    assert gzip_export.headers["content-encoding"] == "gzip"
+    # httpx decodes the gzip content encoding transparently
+    rows = list(csv.reader(io.StringIO(gzip_export.text)))
+    assert [row[0] for row in rows[1:]] == ["router0", "router1", "router2"]
+
+
+def test_report_interns_change_lines(
+    sample_cisco_ios_config: str, sample_cisco_ios_intended_config: str
+) -> None:
+    """Test that change lines are interned and device text is rebuilt exactly."""
+    remediation = RemediationService.generate_remediation(
+        "cisco_ios", sample_cisco_ios_config, sample_cisco_ios_intended_config
+    )
+    report_data = ReportService.create_report(
+        [
+            DeviceRemediation(
+                device_id=f"router{i}",
+                platform="cisco_ios",
+                running_config=sample_cisco_ios_config,
+                intended_config=sample_cisco_ios_intended_config,
+            )
+            for i in range(2)
+        ]
+    )
+
+    change_table = report_data["change_table"]
+    assert len(change_table) == len(set(change_table))
+    first, second = report_data["devices"]
+    assert first["remediation_ids"] is second["remediation_ids"]
+
+    device = ReportService.device_view(report_data, first)
+    assert device["remediation"] == remediation["remediation_config"]
+    assert device["rollback"] == remediation["rollback_config"]
+
+    changes = ReportService.get_changes(report_data)
+    assert changes
+    assert all(set(change.device_ids) == {"router0", "router1"} for change in changes)
+
+
+def test_get_report_changes_sorted_and_paginated(client: TestClient) -> None:
+    """Test sorting report changes by device count and paging with a cursor."""
+    create_response = client.post(
+        "/api/v1/reports",
+        json={
+            "remediations": [
+                {
+                    "device_id": f"router{i}",
+                    "platform": "cisco_ios",
+                    "running_config": "hostname old",
+                    "intended_config": "\n".join(
+                        ["hostname old"] + [f"ntp server 10.0.0.{n}" for n in range(i + 1)]
+                    ),
+                }
+                for i in range(3)
+            ]
+        },
+    )
+    report_id = create_response.json()["report_id"]
+    url = f"/api/v1/reports/{report_id}/changes"
+
+    seen: list[int] = []
+    params: dict[str, str | int] = {"sort": "device_count_desc", "limit": 2}
+    while True:
+        data = client.get(url, params=params).json()
+        assert data["total_unique_changes"] == 3
+        seen.extend(change["device_count"] for change in data["changes"])
+        if data["next_cursor"] is None:
+            break
+        params["cursor"] = data["next_cursor"]
+    assert seen == [3, 2, 1]
+
+    data = client.get(url, params={"sort": "device_count_asc", "min_devices": 2}).json()
+    assert [change["device_count"] for change in data["changes"]] == [2, 3]
+    assert data["total_unique_changes"] == 2
+
+    data = client.get(url, params={"min_devices": 2, "limit": 1}).json()
+    assert data["changes"][0]["change_text"] == "ntp server 10.0.0.0"
+    assert data["next_cursor"] == "1"
+
+    assert client.get(url, params={"sort": "random"}).status_code == 400
+
+
+def test_query_report_devices(client: TestClient) -> None:
+    """Test selecting devices with AND/NOT change filters grouped by platform."""
+    remediations = [
+        {"device_id": "r1", "platform": "cisco_ios", "lines": ["ntp server 10.0.0.1"]},
+        {
+            "device_id": "r2",
+            "platform": "cisco_ios",
+            "lines": ["ntp server 10.0.0.1", "logging host 10.0.0.9"],
+        },
+        {"device_id": "s1", "platform": "cisco_nxos", "lines": ["ntp server 10.0.0.1"]},
+    ]
+    create_response = client.post(
+        "/api/v1/reports",
+        json={
+            "remediations": [
+                {
+                    "device_id": device["device_id"],
+                    "platform": device["platform"],
+                    "running_config": "hostname old",
+                    "intended_config": "\n".join(["hostname old", *device["lines"]]),
+                }
+                for device in remediations
+            ]
+        },
+    )
+    report_id = create_response.json()["report_id"]
+
+    response = client.post(
+        f"/api/v1/reports/{report_id}/query",
+        json={
+            "all_of": ["ntp server 10.0.0.1"],
+            "none_of": ["logging host 10.0.0.9"],
+            "top_changes": 5,
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["device_ids"] == ["r1", "s1"]
+    assert data["by_platform"] == {"cisco_ios": 1, "cisco_nxos": 1}
+    assert data["top_changes"] == [{"change_text": "ntp server 10.0.0.1", "device_count": 2}]
+
+    # Ties keep the order in which changes were first seen
+    data = client.post(
+        f"/api/v1/reports/{report_id}/query",
+        json={"any_of": ["logging host 10.0.0.9"], "top_changes": 1},
+    ).json()
+    assert data["top_changes"] == [{"change_text": "ntp server 10.0.0.1", "device_count": 1}]
+    data = client.post(f"/api/v1/reports/{report_id}/query", json={}).json()
+    assert data["device_count"] == 3
+    assert data["top_changes"] == []
+
+    data = client.post(
+        f"/api/v1/reports/{report_id}/query",
+        json={"any_of": ["logging host 10.0.0.9"], "platforms": ["cisco_nxos"]},
+    ).json()
+    assert data["device_count"] == 0
+
+
+def test_update_report_devices_incrementally(client: TestClient) -> None:
+    """Test that adding, replacing and removing devices matches a rebuilt report."""
+
+    def device(device_id: str, ntp_server: str) -> dict[str, str]:
+        return {
+            "device_id": device_id,
+            "platform": "cisco_ios",
+            "running_config": "hostname old",
+            "intended_config": f"hostname old\nntp server {ntp_server}",
+        }
+
+    report_id = client.post(
+        "/api/v1/reports",
+        json={"remediations": [device("r1", "10.0.0.1"), device("r2", "10.0.0.1")]},
+    ).json()["report_id"]
+
+    response = client.put(
+        f"/api/v1/reports/{report_id}/devices",
+        json={"remediations": [device("r2", "10.0.0.2"), device("r3", "10.0.0.2")]},
+    )
+    assert response.status_code == 200
+    assert response.json()["devices_added"] == 1
+    assert response.json()["devices_replaced"] == 1
+
+    response = client.delete(f"/api/v1/reports/{report_id}/devices/r1")
+    assert response.json()["devices_removed"] == 1
+    assert response.json()["total_devices"] == 2
+    assert client.delete(f"/api/v1/reports/{report_id}/devices/r1").status_code == 404
+
+    rebuilt_id = client.post(
+        "/api/v1/reports",
+        json={"remediations": [device("r2", "10.0.0.2"), device("r3", "10.0.0.2")]},
+    ).json()["report_id"]
+    for path in ("summary", "changes?sort=device_count_desc"):
+        updated = client.get(f"/api/v1/reports/{report_id}/{path}").json()
+        rebuilt = client.get(f"/api/v1/reports/{rebuilt_id}/{path}").json()
+        updated.pop("report_id", None)
+        rebuilt.pop("report_id", None)
+        updated.pop("computations_saved", None)
+        rebuilt.pop("computations_saved", None)
+        assert updated == rebuilt
+
+    data = client.post(
+        f"/api/v1/reports/{report_id}/query", json={"all_of": ["ntp server 10.0.0.1"]}
+    ).json()
+    assert data["device_count"] == 0
+
+
+def test_get_report_cohorts(client: TestClient) -> None:
+    """Test that devices with identical remediations collapse into one cohort."""
+    remediations = [
+        {
+            "device_id": f"r{i}",
+            "platform": "cisco_ios",
+            # Different running configs that need the same change
+            "running_config": f"hostname r{i}",
+            "intended_config": f"hostname r{i}\nntp server {'10.0.0.1' if i < 3 else '10.0.0.2'}",
+        }
+        for i in range(4)
+    ]
+    report_id = client.post("/api/v1/reports", json={"remediations": remediations}).json()[
+        "report_id"
+    ]
+
+    response = client.get(f"/api/v1/reports/{report_id}/cohorts")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_cohorts"] == 2
+    largest = data["cohorts"][0]
+    assert largest["device_ids"] == ["r0", "r1", "r2"]
+    assert largest["remediation"] == "ntp server 10.0.0.1"
+    assert largest["platform"] == "cisco_ios"
+
+    data = client.get(f"/api/v1/reports/{report_id}/cohorts?min_devices=2").json()
+    assert data["total_cohorts"] == 1
+
+
+def test_get_report_cohorts_split_by_platform(client: TestClient) -> None:
+    """Test that identical remediations on different platforms form separate cohorts."""
+    remediations = [
+        {
+            "device_id": f"r{i}",
+            "platform": platform,
+            "running_config": "hostname r",
+            "intended_config": "hostname r\nntp server 10.0.0.1",
+        }
+        for i, platform in enumerate(["cisco_ios", "cisco_ios", "arista_eos"])
+    ]
+    report_id = client.post("/api/v1/reports", json={"remediations": remediations}).json()[
+        "report_id"
+    ]
+
+    cohorts = client.get(f"/api/v1/reports/{report_id}/cohorts").json()["cohorts"]
+    assert [(cohort["platform"], cohort["device_ids"]) for cohort in cohorts] == [
+        ("cisco_ios", ["r0", "r1"]),
+        ("arista_eos", ["r2"]),
+    ]
+    assert cohorts[0]["fingerprint"] == cohorts[1]["fingerprint"]
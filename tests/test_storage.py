@@ -0,0 +1,335 @@
+"""Tests for the storage backends."""
+
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from hier_config_api.models.report import DeviceRemediation
+from hier_config_api.routers import batch
+from hier_config_api.services.report_service import ReportService
+from hier_config_api.utils import storage as storage_module
+from hier_config_api.utils.cache import approximate_size
+from hier_config_api.utils.storage import (
+    InMemoryStorage,
+    RecordTooLargeError,
+    SQLiteStorage,
+    run_storage,
+)
+
+
+def test_sqlite_storage_round_trip(tmp_path: Path) -> None:
+    """Test that reports and remediations survive a reopen of the database."""
+    path = str(tmp_path / "storage.sqlite3")
+    storage = SQLiteStorage(path)
+    report_id = storage.store_report({"total_devices": 1, "ids": array("I", [1, 2])})
+    remediation_id = storage.store_remediation({"remediation_config": "hostname a"})
+    assert storage.update_remediation(remediation_id, {"tags": {"safe": [0]}})
+    storage.close()
+
+    reopened = SQLiteStorage(path)
+    assert reopened.get_report(report_id) == {"total_devices": 1, "ids": array("I", [1, 2])}
+    assert reopened.get_remediation(remediation_id) == {
+        "remediation_config": "hostname a",
+        "tags": {"safe": [0]},
+    }
+    assert reopened.get_report("missing") is None
+    assert reopened.modify_report("missing", lambda report: (True, 0)) is None
+    reopened.close()
+
+
+def test_sqlite_storage_shares_jobs_between_instances(tmp_path: Path) -> None:
+    """Test that job results written by one worker are visible to another."""
+    path = str(tmp_path / "storage.sqlite3")
+    writer = SQLiteStorage(path)
+    reader = SQLiteStorage(path)
+
+    job_id = writer.store_job({"status": "pending", "total_devices": 3, "results": []})
+    assert writer.store_job_results(job_id, 2, [{"device_id": "c", "status": "success"}])
+    assert writer.update_job(job_id, {"status": "running"})
+
+    job = reader.get_job(job_id)
+    assert job is not None
+    assert job["status"] == "running"
+    assert job["results"] == [None, None, {"device_id": "c", "status": "success"}]
+    assert not reader.store_job_results("missing", 0, [])
+    writer.close()
+    reader.close()
+
+
+def test_in_memory_storage_evicts_and_accounts_size() -> None:
+    """Test that collections stay within their byte budget and track updates."""
+    storage = InMemoryStorage(max_bytes=20_000)
+    job_id = storage.store_job({"status": "pending", "results": []})
+    before = storage.stats()["jobs"]["current_bytes"]
+    assert storage.store_job_results(job_id, 0, [{"output": "x" * 1000}])
+    assert storage.stats()["jobs"]["current_bytes"] > before + 1000
+
+    first_id = storage.store_remediation({"error": "a" * 8000})
+    storage.store_remediation({"error": "b" * 8000})
+    storage.store_remediation({"error": "c" * 8000})
+    stats = storage.stats()["remediations"]
+    assert stats["current_bytes"] <= 20_000
+    assert stats["evictions"] == 1
+    assert storage.get_remediation(first_id) is None
+
+
+def test_in_memory_storage_charges_report_size_changes() -> None:
+    """Test that report updates are charged their size change without re-measuring."""
+
+    def devices(count: int, offset: int = 0) -> list[DeviceRemediation]:
+        return [
+            DeviceRemediation(
+                device_id=f"r{index}",
+                platform="cisco_ios",
+                running_config="hostname old",
+                intended_config=f"hostname old\nntp server 10.0.{index}.1\nlogging host 10.1.0.1",
+            )
+            for index in range(offset, offset + count)
+        ]
+
+    def upsert(remediations: list[DeviceRemediation]) -> Any:
+        results, _ = ReportService.remediate_devices(remediations)
+
+        def apply(report: dict[str, Any]) -> tuple[dict[str, int], int]:
+            counts = ReportService.upsert_devices(report, remediations, results)
+            return counts, counts.pop("size_delta")
+
+        return storage.modify_report(report_id, apply)
+
+    storage = InMemoryStorage(max_bytes=100_000_000)
+    report_id = storage.store_report(ReportService.create_report(devices(10)))
+    assert upsert(devices(50, offset=5)) == {"devices_added": 45, "devices_replaced": 5}
+    for index in range(20):
+        storage.modify_report(
+            report_id,
+            lambda report, index=index: ReportService.remove_devices(report, [f"r{index}"]),
+        )
+
+    charged = storage.stats()["reports"]["current_bytes"]
+    actual = approximate_size(storage.get_report(report_id))
+    assert abs(charged - actual) < actual * 0.1
+
+
+def test_in_memory_storage_reports_are_snapshots() -> None:
+    """Test that updating a report leaves reports already handed out untouched."""
+    storage = InMemoryStorage(max_bytes=10_000_000)
+    report = ReportService.create_report(
+        [
+            DeviceRemediation(
+                device_id=f"r{index}",
+                platform="cisco_ios",
+                running_config="hostname old",
+                intended_config="hostname old\nntp server 10.0.0.1",
+            )
+            for index in range(3)
+        ]
+    )
+    report_id = storage.store_report(report)
+    snapshot = storage.get_report(report_id)
+    assert snapshot is not None
+    exported = ReportService.export_report(snapshot, "csv")
+
+    assert (
+        storage.modify_report(
+            report_id, lambda report: ReportService.remove_devices(report, ["r1"])
+        )
+        == 1
+    )
+    assert None not in snapshot["devices"]
+    assert ReportService.export_report(snapshot, "csv") == exported
+    updated = storage.get_report(report_id)
+    assert updated is not None
+    assert updated["devices"][1] is None
+    assert updated["total_devices"] == 2
+
+
+def test_in_memory_storage_rejects_oversized_records(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that a record larger than its collection's budget is refused, not dropped."""
+    storage = InMemoryStorage(max_bytes=5_000)
+    with pytest.raises(RecordTooLargeError):
+        storage.store_report({"devices": ["x" * 10_000]})
+    with pytest.raises(RecordTooLargeError):
+        storage.store_job({"device_configs": [{"running_config": os.urandom(5_000).hex()}]})
+    stats = storage.stats()
+    assert stats["reports"]["entries"] == stats["jobs"]["entries"] == 0
+    assert stats["jobs"]["blob_bytes"] == stats["blobs"]["entries"] == 0
+
+    monkeypatch.setattr(batch, "storage", storage)
+    response = client.post(
+        "/api/v1/batch/remediation",
+        json={"device_configs": [{"device_id": "r1", "running_config": os.urandom(5_000).hex()}]},
+    )
+    assert response.status_code == 413
+
+
+def test_in_memory_storage_charges_blobs_to_records() -> None:
+    """Test that compressed blobs count toward the budget of the records using them."""
+    storage = InMemoryStorage(max_bytes=1_000_000)
+    for _ in range(100):
+        storage.store_remediation({"remediation_config": os.urandom(20_000).hex()})
+
+    stats = storage.stats()
+    assert stats["remediations"]["evictions"] > 0
+    assert stats["remediations"]["current_bytes"] <= 1_000_000
+    assert stats["remediations"]["blob_bytes"] == stats["blobs"]["current_bytes"]
+    assert stats["blobs"]["current_bytes"] <= 1_000_000
+
+
+def test_admin_stats(client: TestClient) -> None:
+    """Test the admin endpoint reporting storage and cache statistics."""
+    response = client.get("/api/v1/admin/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data["storage"]) >= {"reports", "jobs", "remediations"}
+    assert "entries" in data["storage"]["reports"]
+    assert "current_bytes" in data["caches"]["parse"]
+
+
+def test_in_memory_storage_shares_compressed_blobs() -> None:
+    """Test that identical config texts are stored once and freed with their records."""
+    now = [0.0]
+    storage = InMemoryStorage(max_bytes=10 * 1024 * 1024, ttl_seconds=60, clock=lambda: now[0])
+    config = "\n".join(f"interface Ethernet{i}\n no shutdown" for i in range(100))
+    job_id = storage.store_job(
+        {
+            "status": "pending",
+            "device_configs": [
+                {"device_id": f"r{i}", "running_config": config, "intended_config": config}
+                for i in range(3)
+            ],
+            "results": [],
+        }
+    )
+
+    blobs = storage.stats()["blobs"]
+    assert blobs["entries"] == 1
+    assert blobs["references"] == 6
+    assert blobs["current_bytes"] < blobs["text_bytes"]
+
+    job = storage.get_job(job_id)
+    assert job is not None
+    assert job["device_configs"][2]["running_config"] == config
+    assert storage.get_job(job_id, include_device_configs=False)["device_configs"] == []
+
+    # Expiring the job releases its references
+    now[0] = 61
+    assert storage.get_job(job_id) is None
+    assert storage.stats()["blobs"]["entries"] == 0
+
+
+def test_sqlite_storage_serializes_concurrent_updates(tmp_path: Path) -> None:
+    """Test that report updates from several workers are never lost."""
+    path = str(tmp_path / "storage.sqlite3")
+    workers = [SQLiteStorage(path) for _ in range(2)]
+    report_id = workers[0].store_report({"total_devices": 0})
+
+    def increment(report: dict[str, Any]) -> tuple[int, int]:
+        report["total_devices"] += 1
+        return int(report["total_devices"]), 0
+
+    def run(storage: SQLiteStorage) -> None:
+        for _ in range(25):
+            storage.modify_report(report_id, increment)
+
+    threads = [threading.Thread(target=run, args=(storage,)) for storage in workers * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert workers[1].get_report(report_id) == {"total_devices": 100}
+    assert workers[1].modify_report("missing", increment) is None
+    for storage in workers:
+        storage.close()
+
+
+def test_baseline_compare_and_set(tmp_path: Path) -> None:
+    """Test that a baseline is only replaced while its running digest matches."""
+    for storage in (InMemoryStorage(max_bytes=1024 * 1024), SQLiteStorage(str(tmp_path / "b.db"))):
+        assert storage.get_baseline("router1") is None
+        assert not storage.store_baseline("router1", {"running_digest": "a"}, expected_digest="a")
+        assert storage.store_baseline("router1", {"running_digest": "a", "running_config": "x"})
+        assert storage.store_baseline("router1", {"running_digest": "b"}, expected_digest="a")
+        assert not storage.store_baseline("router1", {"running_digest": "c"}, expected_digest="a")
+        assert storage.get_baseline("router1") == {"running_digest": "b"}
+        assert storage.stats()["baselines"]["entries"] == 1
+        storage.close()
+
+
+def test_store_remediation_under_existing_id(tmp_path: Path) -> None:
+    """Test that a remediation can be restored under a known ID."""
+    for storage in (InMemoryStorage(max_bytes=1024 * 1024), SQLiteStorage(str(tmp_path / "r.db"))):
+        assert not storage.touch_remediation("known")
+        assert storage.store_remediation({"summary": 1}, remediation_id="known") == "known"
+        assert storage.store_remediation({"summary": 2}, remediation_id="known") == "known"
+        assert storage.touch_remediation("known")
+        assert storage.get_remediation("known") == {"summary": 2}
+        storage.close()
+
+
+def test_job_status_and_results_by_position(tmp_path: Path) -> None:
+    """Test reading job counters and selected results without the whole job."""
+    for storage in (InMemoryStorage(max_bytes=1024 * 1024), SQLiteStorage(str(tmp_path / "j.db"))):
+        job_id = storage.store_job(
+            {"status": "running", "total_devices": 3, "device_configs": [{}] * 3, "results": []}
+        )
+        storage.store_job_results(job_id, 2, [{"device_id": "c", "remediation": "x" * 300}])
+
+        assert storage.get_job_status(job_id) == {"status": "running", "total_devices": 3}
+        assert storage.get_job_results(job_id, [0, 1, 2]) == {
+            2: {"device_id": "c", "remediation": "x" * 300}
+        }
+        assert storage.get_job_status("missing") is None
+        assert storage.get_job_results("missing", [0]) is None
+        storage.close()
+
+
+def test_sqlite_storage_purges_expired_records_and_blobs(tmp_path: Path) -> None:
+    """Test that expired SQLite records are deleted with the blobs only they referenced."""
+    now = [1000.0]
+    storage = SQLiteStorage(str(tmp_path / "ttl.db"), ttl_seconds=60, clock=lambda: now[0])
+    shared = "interface Gi0/1\n" * 50
+    job_id = storage.store_job(
+        {"status": "running", "device_configs": [{"running_config": shared}], "results": []}
+    )
+    storage.store_job_results(job_id, 0, [{"device_id": "a", "remediation": "y" * 300}])
+    report_id = storage.store_report({"devices": {}})
+    now[0] += 30
+    storage.store_baseline("router1", {"running_digest": "a", "running_config": shared})
+    now[0] += 40
+
+    assert storage.purge_expired() == 2
+    assert storage.get_job(job_id) is None
+    assert storage.get_job_results(job_id, [0]) is None
+    assert storage.get_report(report_id) is None
+    assert storage.get_baseline("router1") == {"running_digest": "a", "running_config": shared}
+    assert storage.stats()["blobs"]["entries"] == 1
+
+    now[0] += 59
+    assert storage.purge_expired() == 0
+    now[0] += 61
+    assert storage.purge_expired() == 1
+    assert storage.stats()["blobs"]["entries"] == 0
+    storage.close()
+
+
+async def test_run_storage_offloads_blocking_backends(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test that SQLite calls leave the event loop while in-memory calls stay inline."""
+    sqlite_storage = SQLiteStorage(str(tmp_path / "io.db"))
+    monkeypatch.setattr(storage_module, "storage", sqlite_storage)
+    assert await run_storage(threading.get_ident) != threading.get_ident()
+    report_id = await run_storage(sqlite_storage.store_report, {"total_devices": 1})
+    assert await run_storage(sqlite_storage.get_report, report_id) == {"total_devices": 1}
+    sqlite_storage.close()
+
+    monkeypatch.setattr(storage_module, "storage", InMemoryStorage(max_bytes=1024))
+    assert await run_storage(threading.get_ident) == threading.get_ident()